@@ -0,0 +1,196 @@
+import heapq
+import json
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Nombre del archivo de estado dentro de la caché de la carpeta de tema
+ARCHIVO_ESTADO = "estado_analisis.json"
+VERSION_ESTADO = 2
+
+CATEGORIAS = ["Positivo", "Neutral", "Negativo"]
+TOP_TWEETS = 5
+COLUMNAS_TOP_TWEETS = ['Fecha', 'Usuario', 'Texto', 'Likes', 'Retweets', 'Respuestas', 'Engagement']
+
+
+def categoria_sentimiento(compound):
+    return "Positivo" if compound >= 0.05 else ("Negativo" if compound <= -0.05 else "Neutral")
+
+
+def mas_comunes(contador, n=None):
+    """Como Counter.most_common, pero desempata por la clave y no por el orden de inserción
+
+    Así el resultado no depende del orden en que se combinaron los archivos.
+    """
+    orden = lambda par: (-par[1], par[0])
+    if n is None:
+        return sorted(contador.items(), key=orden)
+    return heapq.nsmallest(n, contador.items(), key=orden)
+
+
+def firma_archivo(archivo):
+    """(mtime, tamaño) de un archivo DB_*: si cambia, su aporte ya no es válido"""
+    info = Path(archivo).stat()
+    return (info.st_mtime_ns, info.st_size)
+
+
+class EstadoAgregado:
+    """Agregados combinables de una carpeta de tema
+
+    Guarda solo lo necesario para regenerar gráficos, reporte y base de
+    conocimiento: conteos mensuales, conteo por valor de sentimiento (VADER
+    redondea a 4 decimales, así que son pocos valores distintos), Counters de
+    palabras, hashtags y menciones, fechas extremas y los tweets con más
+    engagement. Dos estados se combinan sumando, sin volver a leer filas, y
+    el resultado es el mismo sin importar el orden en que se combinen.
+    """
+
+    def __init__(self):
+        self.version = VERSION_ESTADO
+        self.archivos = {}  # nombre de archivo -> firma_archivo
+        self.total = 0
+        self.fecha_min = None
+        self.fecha_max = None
+        self.meses = Counter()
+        self.sentimientos = Counter()
+        self.palabras_nube = Counter()
+        self.palabras_positivas = Counter()
+        self.palabras_negativas = Counter()
+        self.hashtags = Counter()
+        self.menciones = Counter()
+        self.top_tweets = pd.DataFrame(columns=COLUMNAS_TOP_TWEETS)
+
+    @classmethod
+    def desde_datos(cls, datos, corpus, tabla_polaridad, excluir_nube=()):
+        """Calcula el estado de un bloque de filas ya puntuadas y tokenizadas"""
+        estado = cls()
+        if datos.empty:
+            return estado
+
+        estado.total = len(datos)
+        estado.fecha_min = datos['Fecha'].min()
+        estado.fecha_max = datos['Fecha'].max()
+        estado.meses = Counter(datos['Mes'].value_counts().to_dict())
+        estado.sentimientos = Counter(datos['Sentimiento'].value_counts().to_dict())
+
+        estado.palabras_nube = Counter(corpus.palabras(
+            filas=datos['Texto'].notna().to_numpy(),
+            excluir=excluir_nube
+        ))
+        positivas, negativas = corpus.clasificar(tabla_polaridad)
+        estado.palabras_positivas = Counter(positivas)
+        estado.palabras_negativas = Counter(negativas)
+        estado.hashtags = Counter(corpus.hashtags)
+        estado.menciones = Counter(corpus.menciones)
+
+        engagement = datos['Likes'] + datos['Retweets'] * 2 + datos['Respuestas'] * 1.5
+        candidatos = datos.assign(Engagement=engagement).nlargest(TOP_TWEETS, 'Engagement', keep='all')
+        estado.top_tweets = _ordenar_top(candidatos[COLUMNAS_TOP_TWEETS])
+        return estado
+
+    def combinar(self, otro):
+        """Devuelve un estado nuevo con la suma de ambos"""
+        estado = EstadoAgregado()
+        estado.archivos = {**self.archivos, **otro.archivos}
+        estado.total = self.total + otro.total
+        fechas_min = [f for f in (self.fecha_min, otro.fecha_min) if f is not None]
+        fechas_max = [f for f in (self.fecha_max, otro.fecha_max) if f is not None]
+        estado.fecha_min = min(fechas_min) if fechas_min else None
+        estado.fecha_max = max(fechas_max) if fechas_max else None
+        for campo in ('meses', 'sentimientos', 'palabras_nube', 'palabras_positivas',
+                      'palabras_negativas', 'hashtags', 'menciones'):
+            setattr(estado, campo, getattr(self, campo) + getattr(otro, campo))
+        partes = [t for t in (self.top_tweets, otro.top_tweets) if not t.empty]
+        if partes:
+            estado.top_tweets = _ordenar_top(pd.concat(partes, ignore_index=True))
+        return estado
+
+    # Vistas derivadas, usadas por gráficos, reporte y base de conocimiento
+
+    def tendencia_mensual(self):
+        meses = sorted(self.meses)
+        return pd.Series([self.meses[m] for m in meses],
+                         index=pd.PeriodIndex(meses, freq='M', name='Mes'), dtype='int64')
+
+    def valores_sentimiento(self):
+        """Todas las puntuaciones, ordenadas de menor a mayor"""
+        valores = sorted(self.sentimientos)
+        return np.repeat(np.array(valores, dtype=float),
+                         [self.sentimientos[v] for v in valores])
+
+    def conteo_categorias(self):
+        conteo = Counter()
+        for valor, n in self.sentimientos.items():
+            conteo[categoria_sentimiento(valor)] += n
+        serie = pd.Series({c: conteo[c] for c in CATEGORIAS if conteo[c]}, dtype='int64',
+                          name='count')
+        serie.index.name = 'Categoria_Sentimiento'
+        return serie.sort_values(ascending=False, kind='stable')
+
+    # Persistencia: JSON, como la base de conocimiento, para que leer la
+    # caché de una carpeta no pueda ejecutar código
+
+    def guardar(self, ruta):
+        top = self.top_tweets
+        if not top.empty:
+            top = top.assign(Fecha=top['Fecha'].astype(str))
+        datos = {
+            "version": self.version,
+            "archivos": self.archivos,
+            "total": self.total,
+            "fecha_min": None if self.fecha_min is None else str(self.fecha_min),
+            "fecha_max": None if self.fecha_max is None else str(self.fecha_max),
+            "meses": {str(mes): n for mes, n in self.meses.items()},
+            # Las claves son floats: se guardan como pares para no pasarlas a texto
+            "sentimientos": list(self.sentimientos.items()),
+            "top_tweets": top.to_dict('list'),
+            **{campo: getattr(self, campo) for campo in _CONTADORES_TEXTO}
+        }
+        ruta = Path(ruta)
+        ruta.parent.mkdir(parents=True, exist_ok=True)
+        temporal = ruta.with_name(f".{ruta.name}")
+        temporal.write_text(json.dumps(datos, ensure_ascii=False, default=_a_json), encoding="utf-8")
+        temporal.replace(ruta)
+
+    @classmethod
+    def cargar(cls, ruta):
+        """Lee un estado guardado, o None si no existe o es de otra versión"""
+        try:
+            datos = json.loads(Path(ruta).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        if not isinstance(datos, dict) or datos.get('version') != VERSION_ESTADO:
+            return None
+
+        estado = cls()
+        estado.archivos = {nombre: tuple(firma) for nombre, firma in datos['archivos'].items()}
+        estado.total = datos['total']
+        estado.fecha_min = None if datos['fecha_min'] is None else pd.Timestamp(datos['fecha_min'])
+        estado.fecha_max = None if datos['fecha_max'] is None else pd.Timestamp(datos['fecha_max'])
+        estado.meses = Counter({pd.Period(mes, freq='M'): n for mes, n in datos['meses'].items()})
+        estado.sentimientos = Counter(dict(datos['sentimientos']))
+        for campo in _CONTADORES_TEXTO:
+            setattr(estado, campo, Counter(datos[campo]))
+        top = pd.DataFrame(datos['top_tweets'], columns=COLUMNAS_TOP_TWEETS)
+        if not top.empty:
+            estado.top_tweets = top.assign(Fecha=pd.to_datetime(top['Fecha']))
+        return estado
+
+
+_CONTADORES_TEXTO = ('palabras_nube', 'palabras_positivas', 'palabras_negativas', 'hashtags', 'menciones')
+
+
+def _a_json(valor):
+    # Escalares de numpy (conteos, likes, engagement)
+    if hasattr(valor, 'item'):
+        return valor.item()
+    raise TypeError(f"{type(valor).__name__} no se puede guardar en el estado")
+
+
+def _ordenar_top(tweets):
+    """Top de engagement con desempate estable: fecha, usuario y texto"""
+    ordenados = tweets.sort_values(['Engagement', 'Fecha', 'Usuario', 'Texto'],
+                                   ascending=[False, True, True, True], kind='stable')
+    return ordenados.head(TOP_TWEETS).reset_index(drop=True)
@@ -0,0 +1,454 @@
+import argparse
+import hashlib
+import os
+import queue
+import shutil
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+import pandas as pd
+import pyarrow.feather as feather
+import pyarrow.parquet as pq
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# Formato nativo de las carpetas DB/: Parquet comprimido (columnar).
+# Los DB_*.xlsx antiguos se siguen leyendo hasta que se migren.
+EXTENSION = ".parquet"
+EXTENSION_LEGADO = ".xlsx"
+EXTENSION_PARCIAL = ".parts"
+COMPRESION = "zstd"
+
+# Caché de archivos ya leídos, dentro de cada carpeta de tema
+CARPETA_CACHE = ".cache_analisis"
+TAMAÑO_MAX_CACHE = 512 * 1024 * 1024
+
+# Índice de IDs de tweet de cada carpeta de tema (ver IndiceIds)
+ARCHIVO_INDICE_IDS = "indice_ids.sqlite"
+# Sube cuando cambia cómo se reparten los IDs; un índice de otra versión se rehace
+VERSION_INDICE_IDS = 2
+
+# Columnas que necesita el análisis (se leen solo estas del disco)
+COLUMNAS_ANALISIS = ['ID', 'Fecha', 'Usuario', 'Texto', 'Likes', 'Retweets', 'Respuestas']
+
+
+def listar_archivos_db(carpeta):
+    """Devuelve los archivos DB_* de la carpeta, priorizando Parquet sobre xlsx
+
+    Incluye también las carpetas DB_*.parts de scrapings que no llegaron a
+    consolidarse, para que sus datos parciales sigan siendo utilizables;
+    las que aún no tienen ningún lote se ignoran.
+    """
+    carpeta = Path(carpeta)
+    parquet = {p.stem: p for p in carpeta.glob(f"DB_*{EXTENSION}")}
+    parciales = {p.stem: p for p in carpeta.glob(f"DB_*{EXTENSION_PARCIAL}")
+                 if p.is_dir() and any(p.glob(f"lote_*{EXTENSION}"))}
+    legado = {p.stem: p for p in carpeta.glob(f"DB_*{EXTENSION_LEGADO}")}
+    archivos = {**legado, **parciales, **parquet}
+    # Por número y no como texto (DB_2 antes que DB_10): el orden decide a qué
+    # archivo pertenece cada tweet repetido en IndiceIds
+    return [archivos[stem] for stem in sorted(archivos, key=_orden_archivo_db)]
+
+
+def numero_archivo_db(ruta):
+    """El n de DB_{n}_..., o None si el nombre no sigue ese formato"""
+    partes = Path(ruta).name.split('_')
+    return int(partes[1]) if len(partes) > 1 and partes[1].isdigit() else None
+
+
+def _orden_archivo_db(stem):
+    numero = numero_archivo_db(stem)
+    return (numero is None, numero or 0, stem)
+
+
+def siguiente_archivo_db(carpeta, tema, año):
+    """Construye la ruta del siguiente DB_{n}_{tema}_{año}.parquet de la carpeta
+
+    n es el mayor número en uso más uno, contando también las carpetas
+    .parts vacías y los puntos de control: un número nunca se reutiliza
+    aunque se borre algún archivo, así no se pisa ninguno.
+    """
+    carpeta = Path(carpeta)
+    numeros = [numero_archivo_db(p) for p in carpeta.glob("DB_*")]
+    next_num = max((n for n in numeros if n is not None), default=0) + 1
+    return carpeta / f"DB_{next_num}_{tema[:20]}_{año}{EXTENSION}"
+
+
+def guardar_tweets(df, ruta):
+    """Guarda un DataFrame de tweets en formato Parquet"""
+    df.to_parquet(ruta, index=False, compression=COMPRESION)
+
+
+def leer_archivo_db(ruta, columnas=None):
+    """Lee un archivo DB_* (Parquet o xlsx) cargando solo las columnas indicadas"""
+    ruta = Path(ruta)
+    if ruta.suffix in (EXTENSION, EXTENSION_PARCIAL):
+        return pd.read_parquet(ruta, columns=columnas)
+    return pd.read_excel(ruta, usecols=columnas)
+
+
+class CacheArchivos:
+    """Caché en disco de los DataFrames ya leídos de una carpeta de tema
+
+    Cada archivo DB_* se guarda una vez leído como Arrow/Feather sin comprimir
+    en {carpeta}/.cache_analisis/, con una clave que depende de su nombre,
+    fecha de modificación, tamaño y columnas leídas. Si el archivo cambia la
+    clave deja de coincidir y se vuelve a leer. Al superar `tamaño_max` bytes
+    se eliminan primero las entradas usadas hace más tiempo.
+    """
+
+    def __init__(self, carpeta, tamaño_max=TAMAÑO_MAX_CACHE):
+        self.carpeta = Path(carpeta) / CARPETA_CACHE
+        self.tamaño_max = tamaño_max
+
+    def _ruta(self, archivo, columnas):
+        info = Path(archivo).stat()
+        clave = f"{Path(archivo).name}|{info.st_mtime_ns}|{info.st_size}|{columnas}"
+        resumen = hashlib.sha1(clave.encode("utf-8")).hexdigest()[:16]
+        return self.carpeta / f"{Path(archivo).name}.{resumen}.feather"
+
+    def admite(self, archivo):
+        """Las carpetas .parts siguen creciendo mientras se scrapea: no se cachean"""
+        return Path(archivo).suffix != EXTENSION_PARCIAL
+
+    def obtener(self, archivo, columnas=None):
+        """Devuelve el DataFrame cacheado, o None si no existe o está desactualizado"""
+        if not self.admite(archivo):
+            return None
+        ruta = self._ruta(archivo, columnas)
+        if not ruta.exists():
+            return None
+        try:
+            df = feather.read_feather(ruta)
+        except Exception:
+            ruta.unlink(missing_ok=True)
+            return None
+        os.utime(ruta)  # Marcar como usado recientemente
+        return df
+
+    def guardar(self, archivo, columnas, df):
+        """Guarda el DataFrame de un archivo, reemplazando versiones anteriores"""
+        if not self.admite(archivo):
+            return
+        self.carpeta.mkdir(exist_ok=True)
+        ruta = self._ruta(archivo, columnas)
+        for anterior in self.carpeta.glob(f"{Path(archivo).name}.*.feather"):
+            anterior.unlink(missing_ok=True)
+        temporal = ruta.with_name(f".{ruta.name}")
+        feather.write_feather(df, temporal, compression="uncompressed")
+        temporal.replace(ruta)
+        self._recortar()
+
+    def _recortar(self):
+        entradas = sorted(self.carpeta.glob("*.feather"), key=lambda p: p.stat().st_mtime)
+        total = sum(p.stat().st_size for p in entradas)
+        for entrada in entradas:
+            if total <= self.tamaño_max:
+                break
+            total -= entrada.stat().st_size
+            entrada.unlink(missing_ok=True)
+
+    def invalidar(self):
+        """Elimina toda la caché de la carpeta"""
+        shutil.rmtree(self.carpeta, ignore_errors=True)
+
+
+class IndiceIds:
+    """Índice persistente (SQLite) de los IDs de tweet de una carpeta de tema
+
+    Cada ID pertenece al primer archivo DB_* en el que se registró; los
+    archivos se identifican por su nombre sin extensión, así un scraping
+    en curso (.parts), su archivo consolidado y un xlsx migrado son el mismo.
+    El scraper consulta el índice para no volver a descargar tweets
+    conocidos y el análisis se queda, de cada archivo, solo con las filas
+    que le pertenecen: ningún tweet se cuenta dos veces.
+    """
+
+    def __init__(self, carpeta):
+        self.ruta = Path(carpeta) / ARCHIVO_INDICE_IDS
+        # El scraper lo usa desde el bucle asyncio y desde el hilo de escritura
+        self._conexion = sqlite3.connect(self.ruta, timeout=30, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conexion:
+            self._conexion.executescript("""
+                CREATE TABLE IF NOT EXISTS tweets (id INTEGER PRIMARY KEY, archivo TEXT NOT NULL);
+                CREATE INDEX IF NOT EXISTS tweets_archivo ON tweets (archivo);
+                CREATE TABLE IF NOT EXISTS archivos (nombre TEXT PRIMARY KEY, firma TEXT);
+            """)
+            # La versión 1 registraba los archivos en orden de texto (DB_10 antes que DB_2)
+            if self._conexion.execute("PRAGMA user_version").fetchone()[0] != VERSION_INDICE_IDS:
+                self._conexion.execute("DELETE FROM tweets")
+                self._conexion.execute("DELETE FROM archivos")
+                self._conexion.execute(f"PRAGMA user_version = {VERSION_INDICE_IDS}")
+
+    def __contains__(self, id_tweet):
+        with self._lock:
+            fila = self._conexion.execute("SELECT 1 FROM tweets WHERE id = ?", (int(id_tweet),)).fetchone()
+        return fila is not None
+
+    @staticmethod
+    def _firma(archivo):
+        info = Path(archivo).stat()
+        return f"{Path(archivo).suffix}|{info.st_mtime_ns}|{info.st_size}"
+
+    def registrar(self, archivo, ids, actualizado=False):
+        """Añade los IDs de `archivo`; los que ya eran de otro archivo no cambian de dueño
+
+        Con actualizado=True se guarda la firma del archivo para no volver a
+        registrarlo mientras no cambie.
+        """
+        nombre = Path(archivo).stem
+        firma = self._firma(archivo) if actualizado else None
+        with self._lock, self._conexion:
+            self._conexion.executemany("INSERT OR IGNORE INTO tweets VALUES (?, ?)",
+                                       ((int(i), nombre) for i in ids))
+            self._conexion.execute("INSERT OR REPLACE INTO archivos VALUES (?, ?)", (nombre, firma))
+
+    def desactualizados(self, archivos):
+        """Archivos que hay que (re)registrar antes de usar el índice
+
+        Si desapareció algún archivo registrado, sus IDs quedarían sin dueño:
+        el índice se vacía y hay que registrar todos de nuevo, en orden.
+        """
+        with self._lock:
+            registrados = dict(self._conexion.execute("SELECT nombre, firma FROM archivos"))
+        actuales = {Path(a).stem for a in archivos}
+        if not set(registrados) <= actuales:
+            self.reiniciar()
+            return list(archivos)
+        return [a for a in archivos if registrados.get(Path(a).stem) != self._firma(a)]
+
+    def sincronizar(self, archivos, workers=None):
+        """Deja el índice igual que la carpeta leyendo solo la columna ID de lo desactualizado
+
+        Para el scraper, que no carga los archivos: sin esto los IDs de un
+        DB_* borrado seguirían contando como conocidos. Devuelve los archivos
+        que se registraron.
+        """
+        desactualizados = self.desactualizados(archivos)
+        for archivo, datos in cargar_archivos_db(desactualizados, ['ID'], workers):
+            if not isinstance(datos, Exception):
+                self.registrar(archivo, pd.to_numeric(datos['ID'], errors='coerce').dropna(), actualizado=True)
+        return desactualizados
+
+    def ids_propios(self, archivo):
+        """IDs que pertenecen a `archivo`"""
+        with self._lock:
+            filas = self._conexion.execute("SELECT id FROM tweets WHERE archivo = ?",
+                                           (Path(archivo).stem,)).fetchall()
+        return [f[0] for f in filas]
+
+    def filas_propias(self, archivo, ids):
+        """Máscara de las filas de `archivo` que le pertenecen (una por ID)
+
+        Las filas sin ID se conservan, no hay forma de saber si están repetidas.
+        """
+        ids = pd.to_numeric(pd.Series(ids), errors='coerce')
+        propias = ids.isin(self.ids_propios(archivo)) & ~ids.duplicated()
+        return (propias | ids.isna()).to_numpy()
+
+    def reiniciar(self):
+        with self._lock, self._conexion:
+            self._conexion.execute("DELETE FROM tweets")
+            self._conexion.execute("DELETE FROM archivos")
+
+    def cerrar(self):
+        self._conexion.close()
+
+
+def cargar_archivos_db(archivos, columnas=None, workers=None, progreso=None, cache=None):
+    """Lee varios archivos DB_* en paralelo con un pool de procesos
+
+    Devuelve una lista de (archivo, DataFrame o excepción) en el mismo orden
+    que `archivos`, de modo que el resultado es idéntico al de una lectura
+    secuencial. `progreso(archivo, resultado)` se llama al terminar cada
+    archivo, en orden de finalización. Con `cache` (CacheArchivos) solo se
+    leen los archivos nuevos o modificados desde la última vez.
+    """
+    archivos = list(archivos)
+    resultados = [None] * len(archivos)
+
+    pendientes = []
+    for i, archivo in enumerate(archivos):
+        df = cache.obtener(archivo, columnas) if cache else None
+        if df is None:
+            pendientes.append(i)
+        else:
+            resultados[i] = df
+            if progreso:
+                progreso(archivo, df)
+
+    def terminar(i, resultado):
+        resultados[i] = resultado
+        if cache and not isinstance(resultado, Exception):
+            cache.guardar(archivos[i], columnas, resultado)
+        if progreso:
+            progreso(archivos[i], resultado)
+
+    workers = min(workers or os.cpu_count() or 1, len(pendientes))
+    if workers <= 1:
+        for i in pendientes:
+            try:
+                resultado = leer_archivo_db(archivos[i], columnas)
+            except Exception as e:
+                resultado = e
+            terminar(i, resultado)
+        return list(zip(archivos, resultados))
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futuros = {pool.submit(leer_archivo_db, archivos[i], columnas): i for i in pendientes}
+        for futuro in as_completed(futuros):
+            try:
+                resultado = futuro.result()
+            except Exception as e:
+                resultado = e
+            terminar(futuros[futuro], resultado)
+    return list(zip(archivos, resultados))
+
+
+class EscritorPorLotes:
+    """Escribe tweets en disco por lotes desde un hilo en segundo plano
+
+    Cada lote se guarda como un Parquet independiente dentro de
+    DB_{n}_....parts/ en cuanto se llena, así la memoria no depende del
+    límite de tweets y un fallo a mitad conserva lo ya descargado.
+    cerrar() consolida los lotes en el DB_{n}_....parquet definitivo.
+
+    Si la carpeta de lotes ya existe (un scraping interrumpido) se sigue
+    escribiendo a continuación de los lotes que tenga. `al_guardar(filas)`
+    se llama desde el hilo de escritura cada vez que un lote queda en disco.
+    """
+
+    def __init__(self, ruta, tamaño_lote=500, max_lotes_pendientes=4, al_guardar=None):
+        self.ruta = Path(ruta)
+        self.carpeta_lotes = self.ruta.with_suffix(EXTENSION_PARCIAL)
+        self.carpeta_lotes.mkdir(parents=True, exist_ok=True)
+        self.tamaño_lote = tamaño_lote
+        self.al_guardar = al_guardar
+        lotes = self._lotes_guardados()
+        self.total = sum(pq.read_metadata(lote).num_rows for lote in lotes)
+        self.segundos_escritura = 0.0  # Tiempo del hilo de escritura guardando lotes
+        self._lote = []
+        self._num_lotes = int(lotes[-1].stem.split('_')[-1]) if lotes else 0
+        self._error = None
+        self._cola = queue.Queue(maxsize=max_lotes_pendientes)
+        self._hilo = threading.Thread(target=self._trabajar, daemon=True)
+        self._hilo.start()
+
+    def agregar(self, fila):
+        """Añade un tweet al lote actual y lo envía a disco si está lleno"""
+        if self._error:
+            raise self._error
+        self._lote.append(fila)
+        self.total += 1
+        if len(self._lote) >= self.tamaño_lote:
+            self._vaciar()
+
+    def _lotes_guardados(self):
+        return sorted(self.carpeta_lotes.glob(f"lote_*{EXTENSION}"))
+
+    def ids_guardados(self):
+        """IDs de los tweets que ya están en disco, para no repetirlos al reanudar"""
+        lotes = self._lotes_guardados()
+        if not lotes:
+            return set()
+        return set(pq.read_table(lotes, columns=['ID']).column('ID').to_pylist())
+
+    def _vaciar(self):
+        if self._lote:
+            self._num_lotes += 1
+            destino = self.carpeta_lotes / f"lote_{self._num_lotes:05d}{EXTENSION}"
+            self._cola.put((destino, self._lote))
+            self._lote = []
+
+    def _trabajar(self):
+        while True:
+            tarea = self._cola.get()
+            if tarea is None:
+                break
+            destino, filas = tarea
+            inicio = time.perf_counter()
+            try:
+                # Se escribe con nombre oculto y se renombra, para que un
+                # lote a medio escribir nunca quede visible como dato válido
+                temporal = destino.with_name(f".{destino.name}")
+                guardar_tweets(pd.DataFrame(filas), temporal)
+                temporal.replace(destino)
+                if self.al_guardar:
+                    self.al_guardar(filas)
+            except Exception as e:
+                self._error = e
+            finally:
+                self.segundos_escritura += time.perf_counter() - inicio
+                self._cola.task_done()
+
+    def sincronizar(self):
+        """Envía el lote actual y espera a que todo lo agregado esté en disco"""
+        self._vaciar()
+        self._cola.join()
+        if self._error:
+            raise self._error
+
+    def cerrar(self, consolidar=True):
+        """Escribe el último lote y consolida todos en el archivo definitivo
+
+        Devuelve la ruta del archivo, o None si no se guardó ningún tweet.
+        Con consolidar=False los lotes se dejan en la carpeta .parts para
+        poder reanudar el scraping más tarde. Una carpeta .parts sin lotes
+        se elimina en ambos casos.
+        """
+        self._vaciar()
+        self._cola.put(None)
+        self._hilo.join()
+        if self._error:
+            raise self._error
+
+        lotes = self._lotes_guardados()
+        if not lotes:
+            shutil.rmtree(self.carpeta_lotes, ignore_errors=True)
+            return None
+        if not consolidar:
+            return None
+        if self.ruta.exists():
+            raise FileExistsError(f"{self.ruta.name} ya existe; los lotes se conservan en "
+                                  f"{self.carpeta_lotes.name}")
+
+        # Se copia lote a lote para no cargar todo el scraping en memoria
+        temporal = self.ruta.with_name(f".{self.ruta.name}")
+        escritor = None
+        try:
+            for lote in lotes:
+                tabla = pq.read_table(lote)
+                if escritor is None:
+                    escritor = pq.ParquetWriter(temporal, tabla.schema, compression=COMPRESION)
+                escritor.write_table(tabla.cast(escritor.schema))
+        finally:
+            if escritor is not None:
+                escritor.close()
+        temporal.replace(self.ruta)
+        shutil.rmtree(self.carpeta_lotes)
+        return self.ruta
+
+
+def migrar_carpeta(carpeta, eliminar=False):
+    """Convierte todos los DB_*.xlsx de una carpeta (y subcarpetas) a Parquet"""
+    convertidos = []
+    for xlsx in sorted(Path(carpeta).rglob(f"DB_*{EXTENSION_LEGADO}")):
+        destino = xlsx.with_suffix(EXTENSION)
+        if not destino.exists():
+            guardar_tweets(pd.read_excel(xlsx), destino)
+            convertidos.append(destino)
+        if eliminar:
+            xlsx.unlink()
+    return convertidos
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Migra las carpetas DB_*.xlsx a Parquet")
+    parser.add_argument("carpeta", nargs="?", default="DB", help="Carpeta a migrar (por defecto DB/)")
+    parser.add_argument("--eliminar", action="store_true", help="Borrar los .xlsx una vez convertidos")
+    args = parser.parse_args()
+
+    for ruta in migrar_carpeta(args.carpeta, eliminar=args.eliminar):
+        print(f"Convertido: {ruta}")
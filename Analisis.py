@@ -1,21 +1,21 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog, font as tkfont
-from PIL import Image, ImageTk
-import pandas as pd
-import matplotlib
-matplotlib.use('Agg') 
-import matplotlib.pyplot as plt
 from pathlib import Path
-import nltk
-from nltk.sentiment import SentimentIntensityAnalyzer
-from wordcloud import WordCloud
-from collections import Counter
-import pickle
+import threading
 import webbrowser
-import os
+from datetime import datetime
+import json
+from ProgresoUI import CanalProgreso
+from CargaDiferida import precargar
+from RecursosNLTK import EstadoRecursos, RECURSOS_ANALISIS
+from BaseConocimiento import BaseConocimiento, EXTENSION as EXTENSION_CONOCIMIENTO
+
+# pandas, nltk, matplotlib y PIL se importan al usarlos (ver CargaDiferida);
+# estos módulos se precargan en segundo plano en cuanto se pinta la ventana
+MODULOS_PESADOS = ['nltk', 'nltk.sentiment', 'PIL.Image', 'PIL.ImageTk', 'MotorAnalisis', 'BaseDatosSQLite']
 
 class TrendAnalysisApp:
-    def __init__(self, root):
+    def __init__(self, root, workers=None):
         self.root = root
         self.root.title("Analizador de Tendencias de Twitter")
         self.root.geometry("1000x800")
@@ -23,8 +23,16 @@ class TrendAnalysisApp:
         
         # Variables
         self.selected_folder = tk.StringVar()
+        # Rango de fechas opcional (AAAA-MM-DD); solo se aplica a los temas de la base SQLite
+        self.desde_var = tk.StringVar()
+        self.hasta_var = tk.StringVar()
         self.status_var = tk.StringVar(value="Seleccione una carpeta para analizar")
         self.generated_files = []
+        self.workers = workers  # Procesos para cargar archivos (None = todos los núcleos)
+        self.puntuador = None  # Se crea en el primer análisis y recuerda los textos ya puntuados
+        self.cancel_event = None  # Event del análisis en curso (None si no hay ninguno)
+        self.canal = CanalProgreso()  # Progreso del hilo de análisis, aplicado a ritmo fijo
+        self.recursos = EstadoRecursos(RECURSOS_ANALISIS)  # Léxico de VADER, preparado en segundo plano
         
         # Configuración de estilo
         self.setup_style()
@@ -49,35 +57,13 @@ class TrendAnalysisApp:
         # Footer
         self.create_footer()
         
-        # Precargar recursos NLTK
-        self.load_nltk_resources()
+        # Abierta desde el menú la ventana es un Toplevel: al cerrarla se cancela el análisis en curso
+        self.root.bind("<Destroy>", self.al_cerrar, add="+")
+        
+        # Importar las dependencias pesadas sin bloquear la ventana y después cargar los recursos NLTK
+        precargar(self.root, MODULOS_PESADOS, al_terminar=self.load_nltk_resources)
     
     
-    def analyze_keywords(self, datos, analyzer):
-        """Analiza las palabras positivas y negativas en los tweets"""
-        palabras_positivas = []
-        palabras_negativas = []
-        
-        for texto in datos['Texto']:
-            # Tokenizar y limpiar palabras
-            palabras = [p.strip(".,!?\"':;()[]{}").lower() for p in str(texto).split()]
-            
-            for palabra in palabras:
-                # Filtrar palabras no válidas
-                if (len(palabra) > 3 and 
-                    not palabra.startswith(('http', '@', '#')) and 
-                    palabra.isalpha()):
-                    
-                    # Analizar sentimiento de la palabra
-                    sentimiento = analyzer.polarity_scores(palabra)['compound']
-                    
-                    if sentimiento > 0.1:  # Umbral para positivo
-                        palabras_positivas.append(palabra)
-                    elif sentimiento < -0.1:  # Umbral para negativo
-                        palabras_negativas.append(palabra)
-        
-        return palabras_positivas, palabras_negativas
-    
     def setup_style(self):
         style = ttk.Style()
         style.theme_use('clam')
@@ -170,14 +156,59 @@ class TrendAnalysisApp:
         )
         browse_btn.grid(row=0, column=2, padx=5)
         
+        # Rango de fechas: desde inclusivo, hasta exclusivo, como en AnalisisLote.py
+        fechas_frame = tk.Frame(selection_frame, bg="#ecf0f1")
+        fechas_frame.grid(row=1, column=0, columnspan=3, pady=(10, 0), sticky='w')
+        for columna, (texto, variable) in enumerate([("Desde (AAAA-MM-DD):", self.desde_var),
+                                                     ("Hasta, sin incluir:", self.hasta_var)]):
+            tk.Label(
+                fechas_frame,
+                text=texto,
+                font=("Segoe UI", 10),
+                bg="#ecf0f1",
+                fg="#2c3e50"
+            ).grid(row=0, column=columna * 2, padx=5, sticky='w')
+            ttk.Entry(
+                fechas_frame,
+                textvariable=variable,
+                font=("Segoe UI", 10),
+                width=12
+            ).grid(row=0, column=columna * 2 + 1, padx=5)
+        tk.Label(
+            fechas_frame,
+            text="(opcional; solo para temas de la base SQLite)",
+            font=("Segoe UI", 9),
+            bg="#ecf0f1",
+            fg="#7f8c8d"
+        ).grid(row=0, column=4, padx=5, sticky='w')
+        
         # Botón de análisis
-        analyze_btn = ttk.Button(
+        self.analyze_btn = ttk.Button(
             selection_frame,
             text="Analizar Tendencias",
             command=self.start_analysis,
             style='TButton'
         )
-        analyze_btn.grid(row=1, column=0, columnspan=3, pady=10, sticky='ew')
+        self.analyze_btn.grid(row=2, column=0, columnspan=2, pady=10, sticky='ew')
+        
+        # Botón para cancelar el análisis en curso (se detiene al terminar la etapa actual)
+        self.cancel_btn = ttk.Button(
+            selection_frame,
+            text="Cancelar",
+            command=self.cancel_analysis,
+            style='TButton',
+            state=tk.DISABLED
+        )
+        self.cancel_btn.grid(row=3, column=2, padx=5)
+        
+        # Botón para descartar la caché de archivos ya leídos
+        clear_cache_btn = ttk.Button(
+            selection_frame,
+            text="Limpiar caché",
+            command=self.clear_cache,
+            style='TButton'
+        )
+        clear_cache_btn.grid(row=2, column=2, padx=5, pady=10)
         
         # Barra de estado
         status_label = ttk.Label(
@@ -186,7 +217,15 @@ class TrendAnalysisApp:
             style='Status.TLabel',
             anchor='w'
         )
-        status_label.grid(row=2, column=0, columnspan=3, sticky='ew')
+        status_label.grid(row=3, column=0, columnspan=2, sticky='ew')
+        
+        # Progreso por etapas del análisis
+        self.progress = ttk.Progressbar(
+            selection_frame,
+            orient='horizontal',
+            mode='determinate'
+        )
+        self.progress.grid(row=4, column=0, columnspan=3, pady=(10, 0), sticky='ew')
         
         selection_frame.grid_columnconfigure(1, weight=1)
     
@@ -226,11 +265,15 @@ class TrendAnalysisApp:
         footer.pack(side=tk.BOTTOM, fill=tk.X, pady=10)
     
     def load_nltk_resources(self):
-        try:
-            nltk.download('vader_lexicon', quiet=True)
+        # Se buscan en local y solo se descarga lo que falte, fuera del hilo de Tk
+        self.status_var.set("Preparando recursos NLTK...")
+        self.recursos.iniciar(lambda error: self.root.after(0, lambda: self.nltk_resources_ready(error)))
+    
+    def nltk_resources_ready(self, error):
+        if error is None:
             self.status_var.set("Recursos NLTK cargados correctamente")
-        except Exception as e:
-            messagebox.showerror("Error", f"No se pudieron cargar los recursos NLTK: {str(e)}")
+        else:
+            messagebox.showerror("Error", f"No se pudieron cargar los recursos NLTK: {error}")
     
     def browse_folder(self):
         initial_dir = Path("DB")
@@ -244,6 +287,15 @@ class TrendAnalysisApp:
         if folder:
             self.selected_folder.set(folder)
     
+    def clear_cache(self):
+        if not self.selected_folder.get():
+            messagebox.showwarning("Advertencia", "Por favor seleccione una carpeta")
+            return
+        
+        from Almacenamiento import CacheArchivos
+        CacheArchivos(self.selected_folder.get()).invalidar()
+        self.status_var.set(f"Caché eliminada para {Path(self.selected_folder.get()).name}")
+    
     def start_analysis(self):
         if not self.selected_folder.get():
             messagebox.showwarning("Advertencia", "Por favor seleccione una carpeta para analizar")
@@ -254,263 +306,131 @@ class TrendAnalysisApp:
             messagebox.showerror("Error", f"La carpeta '{tema_path}' no existe")
             return
         
+        try:
+            desde, hasta = self.leer_fechas()
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
+            return
+        
         # Limpiar resultados anteriores
         for widget in self.files_buttons_frame.winfo_children():
             widget.destroy()
         
         self.generated_files = []
         self.status_var.set(f"Analizando carpeta: {tema_path.name}...")
-        self.root.update()
-        
+        self.progress["value"] = 0
+        self.canal.publicar(indice=0, mensaje=f"Analizando carpeta: {tema_path.name}...")
+        self.canal.vigilar(self.root, self.update_progress)
+        
+        # El análisis completo se ejecuta en un hilo; Tk solo recibe el progreso y el resultado.
+        # Solo uno a la vez: un segundo análisis detendría el sondeo del canal del primero
+        self.cancel_event = threading.Event()
+        self.analyze_btn.config(state=tk.DISABLED)
+        self.cancel_btn.config(state=tk.NORMAL)
         try:
-            # Ejecutar el análisis en un hilo separado para no bloquear la interfaz
-            import threading
-            threading.Thread(target=self.run_analysis, args=(tema_path,), daemon=True).start()
+            threading.Thread(target=self.run_analysis, args=(tema_path, self.cancel_event, desde, hasta),
+                             daemon=True).start()
         except Exception as e:
+            self.fin_analisis()
             messagebox.showerror("Error", f"No se pudo iniciar el análisis: {str(e)}")
     
-    def run_analysis(self, tema_path):
+    def leer_fechas(self):
+        """(desde, hasta) del rango indicado, None donde el campo está vacío"""
+        fechas = []
+        for nombre, variable in (("desde", self.desde_var), ("hasta", self.hasta_var)):
+            texto = variable.get().strip()
+            try:
+                fechas.append(datetime.strptime(texto, "%Y-%m-%d").date() if texto else None)
+            except ValueError:
+                raise ValueError(f"La fecha '{nombre}' debe tener el formato AAAA-MM-DD") from None
+        desde, hasta = fechas
+        if desde and hasta and desde >= hasta:
+            raise ValueError("La fecha 'desde' debe ser anterior a 'hasta'")
+        return desde, hasta
+    
+    def cancel_analysis(self):
+        if self.cancel_event is not None:
+            self.cancel_event.set()
+            self.canal.publicar(mensaje="Cancelando al terminar la etapa actual...")
+    
+    def al_cerrar(self, evento):
+        # <Destroy> llega también por cada widget hijo
+        if evento.widget is self.root and self.cancel_event is not None:
+            self.cancel_event.set()
+    
+    def update_progress(self, estado):
+        # El número de etapas llega con el progreso, así no hace falta importar MotorAnalisis
+        if "total" in estado:
+            self.progress["maximum"] = estado["total"]
+        self.progress["value"] = estado["indice"]
+        self.status_var.set(estado["mensaje"])
+    
+    def run_analysis(self, tema_path, cancel_event, desde=None, hasta=None):
+        from nltk.sentiment import SentimentIntensityAnalyzer
+        from ProcesamientoTexto import PuntuadorSentimiento
+        from BaseDatosSQLite import base_para_tema
+        from MotorAnalisis import PipelineAnalisis, ErrorAnalisis, AnalisisCancelado
+        
+        base = None
         try:
-            archivos = list(tema_path.glob("DB_*.xlsx"))
-            if not archivos:
-                self.root.after(0, lambda: messagebox.showwarning(
-                    "Advertencia", 
-                    f"No se encontraron archivos DB_*.xlsx en {tema_path}"))
-                return
-            
-            dfs = []
-            for archivo in archivos:
-                try:
-                    df = pd.read_excel(archivo)
-                    dfs.append(df)
-                    self.root.after(0, lambda: self.status_var.set(
-                        f"Cargando: {archivo.name} ({len(df)} tweets)"))
-                except Exception as e:
-                    self.root.after(0, lambda: messagebox.showwarning(
-                        "Advertencia", 
-                        f"Error al leer {archivo.name}: {e}"))
-            
-            if not dfs:
-                self.root.after(0, lambda: messagebox.showerror(
-                    "Error", 
-                    "No se pudieron cargar datos válidos"))
-                return
-            
-            datos = pd.concat(dfs, ignore_index=True)
-            carpeta_tema = tema_path.name
-                        
-            self.root.after(0, lambda: self.perform_analysis(datos, carpeta_tema))
-            
-            # Mostrar botones para los archivos generados
-            self.root.after(0, self.display_generated_files)
-            
-            self.root.after(0, lambda: self.status_var.set(
-                f"✅ Análisis completado para {carpeta_tema}"))
+            # Solo se puntúa con los recursos NLTK ya preparados
+            if not self.recursos.listo.is_set():
+                self.canal.publicar(mensaje="Esperando a los recursos NLTK...")
+            self.recursos.esperar()
+            if self.puntuador is None:
+                self.puntuador = PuntuadorSentimiento(SentimentIntensityAnalyzer())
             
+            # Las carpetas sin archivos DB_* se analizan desde la base SQLite, si tiene ese tema
+            base = base_para_tema(tema_path)
+            if base is None and (desde or hasta):
+                raise ErrorAnalisis(f"{tema_path.name} se analiza desde sus archivos DB_*: el rango de "
+                                    "fechas solo se aplica a los temas de la base SQLite. "
+                                    "Deje las fechas vacías para analizarlo entero.")
+            pipeline = PipelineAnalisis(
+                tema_path,
+                base=base,
+                desde=desde,
+                hasta=hasta,
+                puntuador=self.puntuador,
+                workers=self.workers,
+                progreso=lambda indice, total, mensaje: self.canal.publicar(indice=indice, total=total, mensaje=mensaje),
+                advertencia=lambda mensaje: self.root.after(
+                    0, lambda: messagebox.showwarning("Advertencia", mensaje)),
+                cancelado=cancel_event
+            )
+            archivos = pipeline.ejecutar()
+            perfil = f"; perfil en {pipeline.ruta_perfil}" if pipeline.ruta_perfil else ""
+            self.canal.publicar(mensaje=
+                f"✅ Análisis completado para {tema_path.name} "
+                f"({self.puntuador.puntuados} textos distintos puntuados, "
+                f"{self.puntuador.tasa_aciertos:.0%} reutilizados{perfil})")
+            self.root.after(0, lambda: self.finish_analysis(archivos))
+        except AnalisisCancelado:
+            self.canal.publicar(mensaje=f"Análisis de {tema_path.name} cancelado")
+        except ErrorAnalisis as e:
+            mensaje = str(e)
+            self.root.after(0, lambda: messagebox.showwarning("Advertencia", mensaje))
+            self.canal.publicar(mensaje=f"❌ Error al analizar {tema_path.name}")
         except Exception as e:
-            self.root.after(0, lambda: messagebox.showerror(
-                "Error", 
-                f"Error durante el análisis: {str(e)}"))
-            self.root.after(0, lambda: self.status_var.set(
-                f"❌ Error al analizar {tema_path.name}"))
+            mensaje = f"Error durante el análisis: {str(e)}"
+            self.root.after(0, lambda: messagebox.showerror("Error", mensaje))
+            self.canal.publicar(mensaje=f"❌ Error al analizar {tema_path.name}")
+        finally:
+            if base is not None:
+                base.cerrar()
+            self.canal.detener()
+            self.root.after(0, self.fin_analisis)
     
-    def perform_analysis(self, datos, carpeta_tema):        
-        # Configurar Fecha y Mes
-        datos['Fecha'] = pd.to_datetime(datos['Fecha'])
-        datos['Mes'] = datos['Fecha'].dt.to_period('M')
-        
-        # Análisis de sentimientos
-        analyzer = SentimentIntensityAnalyzer()
-        datos['Sentimiento'] = datos['Texto'].apply(lambda x: analyzer.polarity_scores(str(x))['compound'])
-        datos['Categoria_Sentimiento'] = datos['Sentimiento'].apply(
-            lambda x: "Positivo" if x >= 0.05 else ("Negativo" if x <= -0.05 else "Neutral")
-        )
-        
-        # 1. Gráfico de tendencia mensual
-        tendencia_mensual = datos.groupby('Mes').size()
-        plt.figure(figsize=(12, 6))
-        tendencia_mensual.plot(kind='line', marker='o', color='purple')
-        plt.title(f'Tendencia Mensual de Tweets - {carpeta_tema}')
-        plt.ylabel('Cantidad de Tweets')
-        plt.grid(True)
-        tendencia_path = f'tendencia_mensual_{carpeta_tema}.png'
-        plt.savefig(tendencia_path)
-        plt.close()
-        self.generated_files.append(("📈 Tendencia Mensual", tendencia_path))
-        
-        # 2. Histograma de sentimientos
-        plt.figure(figsize=(10, 5))
-        datos['Sentimiento'].hist(bins=20, color='skyblue', edgecolor='black')
-        plt.title(f'Distribución de Sentimientos - {carpeta_tema}', pad=20)
-        plt.xlabel('Puntuación de Sentimiento')
-        plt.ylabel('Cantidad de Tweets')
-        plt.axvline(x=0.05, color='green', linestyle='--', label='Positivo')
-        plt.axvline(x=-0.05, color='red', linestyle='--', label='Negativo')
-        plt.legend()
-        sentimientos_path = f'sentimientos_{carpeta_tema}.png'
-        plt.savefig(sentimientos_path, bbox_inches='tight')
-        plt.close()
-        self.generated_files.append(("📊 Histograma Sentimientos", sentimientos_path))
-        
-        # 3. Gráfico de pastel de sentimientos
-        sentimiento_counts = datos['Categoria_Sentimiento'].value_counts()
-        plt.figure(figsize=(8, 8))
-        plt.pie(sentimiento_counts, labels=sentimiento_counts.index, autopct='%1.1f%%', startangle=140,
-                colors=['lightgreen', 'lightcoral', 'lightgray'])
-        plt.title(f'Comportamiento General del Tema - {carpeta_tema}')
-        plt.axis('equal')
-        pastel_path = f"comportamiento_pastel_{carpeta_tema}.png"
-        plt.savefig(pastel_path, bbox_inches='tight')
-        plt.close()
-        self.generated_files.append(("📊 Pastel Sentimientos", pastel_path))
-        
-        # 4. Gráfico de caja y bigotes
-        plt.figure(figsize=(10, 6))
-        datos.boxplot(column='Sentimiento', by='Categoria_Sentimiento', grid=False,
-                     boxprops=dict(linestyle='-', linewidth=1.5, color='purple'),
-                     whiskerprops=dict(linestyle='-', linewidth=1.5, color='navy'),
-                     medianprops=dict(linestyle='-', linewidth=2, color='red'),
-                     capprops=dict(linestyle='-', linewidth=1.5, color='black'),
-                     flierprops=dict(marker='o', markersize=3, markerfacecolor='gray'))
-        plt.title(f'Distribución de Sentimientos - {carpeta_tema}')
-        plt.suptitle('')
-        plt.xlabel('Categoría de Sentimiento')
-        plt.ylabel('Puntuación de Sentimiento')
-        boxplot_path = f"boxplot_sentimientos_{carpeta_tema}.png"
-        plt.savefig(boxplot_path, bbox_inches='tight')
-        plt.close()
-        self.generated_files.append(("📦 Caja y Bigotes", boxplot_path))
-        
-        # 5. Nube de palabras
-        texto_completo = " ".join(datos['Texto'].dropna().astype(str))
-        palabras = [p.strip(".,!?\"':;()[]{}").lower() for p in texto_completo.split()]
-        
-        # Filtrado de palabras (similar a tu función original)
-        jerga_internet = {'lol', 'omg', 'wtf', 'rofl', 'smh', 'tbh', 'btw', 'imo', 'imho', 'ftw'}
-        stopwords_es = {'de', 'la', 'que', 'el', 'en', 'y', 'a', 'los', 'del', 'se'}
-        
-        def es_palabra_valida(palabra):
-            return (len(palabra) > 3 and 
-                    not palabra.startswith(('http', '@', '#')) and 
-                    palabra.lower() not in stopwords_es and 
-                    palabra.lower() not in jerga_internet and
-                    palabra.isalpha())
-        
-        palabras_filtradas = [p for p in palabras if es_palabra_valida(p)]
-        
-        wordcloud = WordCloud(width=1200, height=600, background_color='white', 
-                             max_words=100, colormap='plasma').generate(" ".join(palabras_filtradas))
-        
-        plt.figure(figsize=(14, 7))
-        plt.imshow(wordcloud, interpolation='bilinear')
-        plt.axis('off')
-        plt.title(f'Nube de Palabras Relevantes - {carpeta_tema}', fontsize=16)
-        nube_path = f"nube_palabras_{carpeta_tema}.png"
-        plt.savefig(nube_path, bbox_inches='tight')
-        plt.close()
-        self.generated_files.append(("☁️ Nube de Palabras", nube_path))
-        
-        # 6. Reporte completo
-        reporte_path = f"reporte_{carpeta_tema}.txt"
-        with open(reporte_path, 'w', encoding='utf-8') as f:
-            f.write(f"REPORTE COMPLETO: {carpeta_tema.upper()}\n")
-            f.write("="*50 + "\n\n")
-            f.write(f"Rango temporal: {datos['Fecha'].min()} a {datos['Fecha'].max()}\n")
-            f.write(f"Tweets analizados: {len(datos)}\n\n")
-
-            # Estadísticas de sentimientos
-            sentimientos = datos['Categoria_Sentimiento'].value_counts(normalize=True) * 100
-            f.write("SENTIMIENTOS:\n")
-            for cat, pct in sentimientos.items():
-                f.write(f"  {cat}: {pct:.1f}%\n")
-
-            # Palabras positivas y negativas
-            positivas, negativas = self.analyze_keywords(datos, analyzer)
-            top_positivas = Counter(positivas).most_common(10)
-            top_negativas = Counter(negativas).most_common(10)
-
-            f.write("\nPALABRAS POSITIVAS RELEVANTES:\n")
-            for palabra, conteo in top_positivas:
-                f.write(f"  {palabra}: {conteo}\n")
-
-            f.write("\nPALABRAS NEGATIVAS RELEVANTES:\n")
-            for palabra, conteo in top_negativas:
-                f.write(f"  {palabra}: {conteo}\n")
-
-            # Tendencia dominante
-            sentimiento_counts = datos['Categoria_Sentimiento'].value_counts()
-            mayor_sentimiento = sentimiento_counts.idxmax()
-            porcentaje_mayor = sentimiento_counts.max() / sentimiento_counts.sum() * 100
-
-            f.write("\nTENDENCIA DOMINANTE:\n")
-            if porcentaje_mayor >= 60:
-                f.write(f"  Existe una tendencia marcada hacia el sentimiento **{mayor_sentimiento.upper()}** ({porcentaje_mayor:.1f}%)\n")
-            else:
-                f.write("  No se detecta una tendencia clara dominante en los sentimientos expresados.\n")
-
-            # Hashtags más usados
-            hashtags = Counter(
-                palabra.lower() for texto in datos['Texto']
-                for palabra in str(texto).split() if palabra.startswith('#')
-            )
-            f.write("\nTOP HASHTAGS:\n")
-            for ht, cnt in hashtags.most_common(10):
-                f.write(f"  #{ht}: {cnt}\n")
-
-            # Tweets con mayor engagement
-            datos['Engagement'] = datos['Likes'] + datos['Retweets'] * 2 + datos['Respuestas'] * 1.5
-            top_tweets = datos.nlargest(5, 'Engagement')
-            f.write("\nTWEETS DESTACADOS:\n")
-            for _, row in top_tweets.iterrows():
-                f.write(f"\n📅 {row['Fecha']} | 👤 @{row['Usuario']}\n")
-                f.write(f"❤️ {row['Likes']} | 🔄 {row['Retweets']} | 💬 {row['Respuestas']}\n")
-                f.write(f"📝 {row['Texto']}\n")
-
-        self.generated_files.append(("📄 Reporte Completo", reporte_path))
-        
-        # 7. Base de conocimiento
-        conocimiento_path = f"base_conocimiento_{carpeta_tema}.pkl"
+    def fin_analisis(self):
+        # La ventana puede haberse cerrado mientras terminaba el hilo
+        if self.root.winfo_exists():
+            self.analyze_btn.config(state=tk.NORMAL)
+            self.cancel_btn.config(state=tk.DISABLED)
     
-        # Hashtags filtrados
-        top_hashtags = [ht for ht in hashtags.most_common(20) if not any(c.isdigit() for c in ht[0])]
-        
-        # Usuarios más mencionados
-        top_usuarios = Counter(
-            palabra.lower() for texto in datos['Texto']
-            for palabra in str(texto).split() if palabra.startswith('@')
-        ).most_common(10)
-
-        base_conocimiento = {
-            'tema': carpeta_tema,
-            'hashtags': top_hashtags,
-            'usuarios_mencionados': top_usuarios,
-            'tendencia_sentimiento': mayor_sentimiento,
-            'porcentaje_dominante': porcentaje_mayor,
-            'palabras_positivas': top_positivas,
-            'palabras_negativas': top_negativas,
-            'metricas_estadisticas': {
-                'media_sentimiento': datos['Sentimiento'].mean(),
-                'mediana_sentimiento': datos['Sentimiento'].median(),
-                'desviacion_estandar': datos['Sentimiento'].std(),
-                'rango_intercuartil': datos['Sentimiento'].quantile(0.75) - datos['Sentimiento'].quantile(0.25)
-            },
-            'tweets_destacados': [
-                {
-                    'fecha': str(row['Fecha']),
-                    'usuario': row['Usuario'],
-                    'texto': row['Texto'],
-                    'likes': row['Likes'],
-                    'retweets': row['Retweets'],
-                    'respuestas': row['Respuestas'],
-                    'engagement': row['Engagement']
-                }
-                for _, row in top_tweets.iterrows()
-            ]
-        }
-
-        with open(conocimiento_path, 'wb') as f:
-            pickle.dump(base_conocimiento, f)
-        self.generated_files.append(("💾 Base de Conocimiento", conocimiento_path))
+    def finish_analysis(self, archivos):
+        # Mostrar botones para los archivos generados
+        self.generated_files = archivos
+        self.display_generated_files()
     
     def display_generated_files(self):
         # Limpiar frame de botones
@@ -539,6 +459,8 @@ class TrendAnalysisApp:
             self.display_image(filepath)
         elif filepath.endswith('.txt'):
             self.open_text_file(filepath)
+        elif filepath.endswith(EXTENSION_CONOCIMIENTO):
+            self.show_knowledge_base(filepath)
         elif filepath.endswith('.pkl'):
             messagebox.showinfo(
                 "Base de Conocimiento", 
@@ -547,6 +469,7 @@ class TrendAnalysisApp:
             webbrowser.open(filepath)
     
     def display_image(self, image_path):
+        from PIL import Image, ImageTk
         try:
             self.clear_image()
             
@@ -583,20 +506,38 @@ class TrendAnalysisApp:
                 widget.destroy()
     
     def open_image_full(self, image_path):
+        from PIL import Image
         try:
             img = Image.open(image_path)
             img.show()
         except Exception as e:
             messagebox.showerror("Error", f"No se pudo abrir la imagen: {str(e)}")
     
+    def show_knowledge_base(self, filepath):
+        # Solo el resumen de la cabecera, sin leer las secciones voluminosas
+        try:
+            with BaseConocimiento.abrir(filepath) as base:
+                resumen = base.resumen()
+            content = json.dumps(resumen, indent=2, ensure_ascii=False)
+        except Exception as e:
+            messagebox.showerror("Error", f"No se pudo leer la base de conocimiento: {str(e)}")
+            return
+        self.show_text_window(Path(filepath).name, content)
+    
     def open_text_file(self, filepath):
         try:
             with open(filepath, 'r', encoding='utf-8') as f:
                 content = f.read()
-            
+        except Exception as e:
+            messagebox.showerror("Error", f"No se pudo leer el archivo: {str(e)}")
+            return
+        self.show_text_window(Path(filepath).name, content)
+    
+    def show_text_window(self, nombre, content):
+        try:
             # Crear ventana emergente para mostrar el texto
             text_window = tk.Toplevel(self.root)
-            text_window.title(f"Contenido: {Path(filepath).name}")
+            text_window.title(f"Contenido: {nombre}")
             text_window.geometry("800x600")
             
             text_frame = tk.Frame(text_window)
@@ -627,7 +568,7 @@ class TrendAnalysisApp:
             close_btn.pack(pady=10)
             
         except Exception as e:
-            messagebox.showerror("Error", f"No se pudo leer el archivo: {str(e)}")
+            messagebox.showerror("Error", f"No se pudo mostrar el archivo: {str(e)}")
 
 if __name__ == "__main__":
     root = tk.Tk()
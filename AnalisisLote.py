@@ -0,0 +1,130 @@
+import argparse
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+from Almacenamiento import listar_archivos_db
+from BaseDatosSQLite import BaseTweets
+from MotorAnalisis import PipelineAnalisis
+
+# Análisis sin interfaz gráfica de varias carpetas de tema, pensado para
+# ejecutarse desde cron en un servidor sin pantalla:
+#
+#   python AnalisisLote.py                      # todas las carpetas de DB/
+#   python AnalisisLote.py DB/ia DB/python --salida resultados --workers 4
+#   python AnalisisLote.py --base DB/tweets.sqlite --desde 2025-03-01 --hasta 2025-04-01
+#   python AnalisisLote.py DB/ia --perfil cprofile  # profile_ia.json y un .prof por etapa
+
+
+def carpetas_de_tema(raiz="DB"):
+    """Carpetas con archivos DB_*: las subcarpetas de `raiz` y la propia raíz"""
+    raiz = Path(raiz)
+    candidatas = [raiz] + sorted(p for p in raiz.iterdir() if p.is_dir() and not p.name.startswith('.'))
+    return [c for c in candidatas if listar_archivos_db(c)]
+
+
+def analizar_carpeta(tema_path, carpeta_salida, incremental=True, ruta_base=None, desde=None, hasta=None,
+                     perfil=None):
+    """Analiza una carpeta de tema y escribe sus archivos en carpeta_salida/<tema>/
+
+    Con `ruta_base` el tema se lee de esa base SQLite en lugar de los DB_*.
+    `perfil` es el modo del perfil por etapas (ver Perfilador).
+    """
+    tema_path = Path(tema_path)
+    destino = Path(carpeta_salida) / tema_path.name
+    destino.mkdir(parents=True, exist_ok=True)
+
+    # Cada proceso abre su propia conexión a la base
+    base = BaseTweets(ruta_base) if ruta_base else None
+    advertencias = []
+    try:
+        pipeline = PipelineAnalisis(
+            tema_path,
+            workers=1,  # El paralelismo está entre carpetas, no dentro de cada una
+            advertencia=advertencias.append,
+            carpeta_salida=destino,
+            incremental=incremental,
+            base=base,
+            desde=desde,
+            hasta=hasta,
+            perfil=perfil
+        )
+        archivos = pipeline.ejecutar()
+    finally:
+        if base is not None:
+            base.cerrar()
+    return [ruta for _, ruta in archivos], advertencias
+
+
+def analizar_lote(carpetas, carpeta_salida="resultados", workers=None, incremental=True,
+                  ruta_base=None, desde=None, hasta=None, perfil=None):
+    """Analiza varias carpetas en procesos paralelos
+
+    Devuelve {carpeta: (archivos generados, advertencias) o excepción}.
+    """
+    resultados = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futuros = {pool.submit(analizar_carpeta, carpeta, carpeta_salida, incremental,
+                               ruta_base, desde, hasta, perfil): carpeta
+                   for carpeta in carpetas}
+        for futuro in as_completed(futuros):
+            carpeta = futuros[futuro]
+            try:
+                resultados[carpeta] = futuro.result()
+            except Exception as e:
+                resultados[carpeta] = e
+    return resultados
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Análisis de tendencias sin interfaz gráfica")
+    parser.add_argument("carpetas", nargs="*", help="Carpetas de tema (por defecto todas las de DB/)")
+    parser.add_argument("--raiz", default="DB", help="Carpeta raíz a recorrer si no se indican carpetas")
+    parser.add_argument("--salida", default="resultados", help="Carpeta donde se crea una subcarpeta por tema")
+    parser.add_argument("--workers", type=int, default=None, help="Carpetas analizadas a la vez")
+    parser.add_argument("--completo", action="store_true", help="Recalcular todo en lugar de solo los archivos nuevos")
+    parser.add_argument("--base", help="Leer los temas de esta base SQLite en lugar de los archivos DB_*")
+    parser.add_argument("--desde", help="Solo tweets desde esta fecha, AAAA-MM-DD (requiere --base)")
+    parser.add_argument("--hasta", help="Solo tweets anteriores a esta fecha, AAAA-MM-DD (requiere --base)")
+    parser.add_argument("--perfil", nargs="?", const="resumen", choices=["resumen", "cprofile"],
+                        help="Guardar profile_<tema>.json con tiempo, CPU, memoria y filas de cada etapa "
+                             "(con cprofile, también un .prof por etapa)")
+    args = parser.parse_args(argv)
+    if (args.desde or args.hasta) and not args.base:
+        parser.error("--desde y --hasta requieren --base")
+
+    if args.base:
+        # Con la base, cada tema es el nombre de una carpeta; sin carpetas se analizan todos
+        if not Path(args.base).exists():
+            parser.error(f"No existe la base {args.base}")
+        base = BaseTweets(args.base)
+        temas = base.temas()
+        base.cerrar()
+        raiz = Path(args.raiz)
+        carpetas = [Path(c) for c in args.carpetas] or [raiz if tema == raiz.name else raiz / tema
+                                                         for tema in temas]
+    else:
+        carpetas = [Path(c) for c in args.carpetas] or carpetas_de_tema(args.raiz)
+    if not carpetas:
+        print(f"No se encontraron carpetas con archivos DB_* en {args.raiz}")
+        return 1
+
+    resultados = analizar_lote(carpetas, args.salida, args.workers, incremental=not args.completo,
+                               ruta_base=args.base, desde=args.desde, hasta=args.hasta, perfil=args.perfil)
+
+    errores = 0
+    for carpeta in carpetas:
+        resultado = resultados[carpeta]
+        if isinstance(resultado, Exception):
+            errores += 1
+            print(f"❌ {carpeta}: {resultado}")
+            continue
+        archivos, advertencias = resultado
+        print(f"✅ {carpeta}: {len(archivos)} archivos en {Path(args.salida) / carpeta.name}")
+        for advertencia in advertencias:
+            print(f"   ⚠️ {advertencia}")
+    return 1 if errores else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
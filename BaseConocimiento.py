@@ -0,0 +1,202 @@
+import argparse
+import json
+import pickle
+import struct
+from collections.abc import Mapping
+from pathlib import Path
+
+# Formato de la base de conocimiento que genera el análisis y usa el modelo
+# de predicciones. Sustituye al pickle: no ejecuta código al leerse y se
+# puede abrir sin cargarlo entero.
+#
+#   MAGIA (8 bytes) | largo de la cabecera (8 bytes, little endian) | cabecera JSON
+#   | relleno hasta múltiplo de ALINEACION | secciones, cada una alineada
+#
+# La cabecera lleva la versión, los datos pequeños (tema, métricas, listas de
+# hashtags y palabras) y la tabla de secciones. Las secciones voluminosas
+# (tweets destacados y, en el futuro, vectores de términos) solo se leen al
+# pedirlas, abriendo el archivo solo para esa lectura: no queda abierto ni
+# mapeado, así un análisis puede reemplazarlo (también en Windows) mientras
+# Predicciones lo tiene cargado. Los .pkl de versiones anteriores se siguen
+# pudiendo abrir.
+EXTENSION = ".bcon"
+EXTENSION_ANTIGUA = ".pkl"
+MAGIA = b"BCONOC\x00\x01"
+VERSION = 1
+ALINEACION = 64
+
+# Claves que se guardan como sección aparte en lugar de en la cabecera
+SECCIONES = ('tweets_destacados',)
+
+
+class FormatoNoValido(Exception):
+    """El archivo no es una base de conocimiento o es de una versión posterior"""
+
+
+def _a_json(valor):
+    # Escalares de numpy/pandas (medias, conteos) y fechas
+    if hasattr(valor, 'item'):
+        return valor.item()
+    return str(valor)
+
+
+def _relleno(posicion):
+    return -posicion % ALINEACION
+
+
+def guardar(ruta, datos, secciones=SECCIONES):
+    """Escribe `datos` (dict) en el formato versionado
+
+    Las claves de `secciones` presentes en `datos` se guardan aparte: como
+    JSON o, si son arrays numpy, con sus bytes tal cual.
+    """
+    cabecera = {"version": VERSION, "datos": {}, "secciones": {}}
+    cuerpos = []
+    posicion = 0
+    for clave, valor in datos.items():
+        if clave not in secciones:
+            cabecera["datos"][clave] = valor
+            continue
+        if hasattr(valor, 'dtype') and hasattr(valor, 'tobytes'):
+            cuerpo = valor.tobytes()
+            info = {"formato": "numpy", "dtype": valor.dtype.str, "forma": list(valor.shape)}
+        else:
+            cuerpo = json.dumps(valor, ensure_ascii=False, default=_a_json).encode("utf-8")
+            info = {"formato": "json"}
+        info.update(inicio=posicion, bytes=len(cuerpo))
+        cabecera["secciones"][clave] = info
+        cuerpos.append(cuerpo + b"\x00" * _relleno(len(cuerpo)))
+        posicion += len(cuerpos[-1])
+
+    texto = json.dumps(cabecera, ensure_ascii=False, default=_a_json).encode("utf-8")
+    inicio = len(MAGIA) + 8 + len(texto)
+
+    # Se escribe con nombre oculto y se renombra, como el resto de archivos del análisis
+    ruta = Path(ruta)
+    temporal = ruta.with_name(f".{ruta.name}")
+    with open(temporal, 'wb') as f:
+        f.write(MAGIA)
+        f.write(struct.pack("<Q", len(texto)))
+        f.write(texto)
+        f.write(b"\x00" * _relleno(inicio))
+        for cuerpo in cuerpos:
+            f.write(cuerpo)
+    temporal.replace(ruta)
+    return ruta
+
+
+class BaseConocimiento(Mapping):
+    """Base de conocimiento abierta: se usa como el dict que se guardó
+
+    Abrirla solo lee la cabecera; cada sección se lee la primera vez que se
+    pide (base['tweets_destacados']) y queda en memoria. Entre lecturas el
+    archivo no queda abierto; cerrar() libera las secciones cargadas y
+    también se puede usar con `with`.
+    """
+
+    def __init__(self, ruta, datos, secciones=None, inicio=0, version=VERSION):
+        self.ruta = Path(ruta)
+        self.version = version
+        self._datos = dict(datos)
+        self._secciones = secciones or {}
+        self._inicio = inicio
+        self._cargadas = {}
+        # Si el archivo se reemplaza después de abrirlo, sus secciones ya no corresponden a esta cabecera
+        self._firma = self._firma_archivo() if self._secciones else None
+
+    @classmethod
+    def abrir(cls, ruta):
+        """Abre un .bcon leyendo solo su cabecera (o un .pkl antiguo, entero)"""
+        ruta = Path(ruta)
+        if ruta.suffix == EXTENSION_ANTIGUA:
+            return cls.desde_pickle(ruta)
+
+        with open(ruta, 'rb') as f:
+            if f.read(len(MAGIA)) != MAGIA:
+                raise FormatoNoValido(f"{ruta.name} no es una base de conocimiento")
+            largo, = struct.unpack("<Q", f.read(8))
+            cabecera = json.loads(f.read(largo).decode("utf-8"))
+            if cabecera.get("version", 0) > VERSION:
+                raise FormatoNoValido(f"{ruta.name} es de una versión posterior ({cabecera['version']}); "
+                                      "actualice la aplicación")
+            inicio = len(MAGIA) + 8 + largo
+            inicio += _relleno(inicio)
+        return cls(ruta, cabecera["datos"], cabecera["secciones"], inicio, cabecera["version"])
+
+    @classmethod
+    def desde_pickle(cls, ruta):
+        """Lector de compatibilidad para los .pkl (solo archivos de confianza: pickle ejecuta código)"""
+        with open(ruta, 'rb') as f:
+            datos = pickle.load(f)
+        return cls(ruta, datos, version=0)
+
+    def _firma_archivo(self):
+        info = self.ruta.stat()
+        return info.st_mtime_ns, info.st_size
+
+    def seccion(self, nombre):
+        if nombre not in self._cargadas:
+            info = self._secciones[nombre]
+            if self._firma_archivo() != self._firma:
+                raise FormatoNoValido(f"{self.ruta.name} cambió desde que se abrió; vuelva a cargarlo")
+            with open(self.ruta, 'rb') as f:
+                f.seek(self._inicio + info["inicio"])
+                cuerpo = f.read(info["bytes"])
+            if len(cuerpo) != info["bytes"]:
+                raise FormatoNoValido(f"{self.ruta.name} está incompleto (sección {nombre})")
+            if info["formato"] == "numpy":
+                import numpy as np
+                valor = np.frombuffer(cuerpo, np.dtype(info["dtype"])).reshape(info["forma"])
+            else:
+                valor = json.loads(cuerpo.decode("utf-8"))
+            self._cargadas[nombre] = valor
+        return self._cargadas[nombre]
+
+    def resumen(self):
+        """Solo los datos de la cabecera, sin leer ninguna sección"""
+        return dict(self._datos)
+
+    def __getitem__(self, clave):
+        if clave in self._datos:
+            return self._datos[clave]
+        if clave in self._secciones:
+            return self.seccion(clave)
+        raise KeyError(clave)
+
+    def __iter__(self):
+        yield from self._datos
+        yield from self._secciones
+
+    def __len__(self):
+        return len(self._datos) + len(self._secciones)
+
+    def cerrar(self):
+        self._cargadas.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.cerrar()
+
+
+def convertir(ruta_pkl, eliminar=False):
+    """Convierte un .pkl antiguo al formato actual; devuelve la ruta nueva"""
+    ruta_pkl = Path(ruta_pkl)
+    base = BaseConocimiento.desde_pickle(ruta_pkl)
+    destino = guardar(ruta_pkl.with_suffix(EXTENSION), dict(base))
+    if eliminar:
+        ruta_pkl.unlink()
+    return destino
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convierte bases de conocimiento .pkl al formato .bcon")
+    parser.add_argument("rutas", nargs="+", help="Archivos .pkl o carpetas donde buscarlos")
+    parser.add_argument("--eliminar", action="store_true", help="Borrar cada .pkl convertido")
+    args = parser.parse_args()
+
+    for ruta in map(Path, args.rutas):
+        archivos = sorted(ruta.rglob(f"base_conocimiento_*{EXTENSION_ANTIGUA}")) if ruta.is_dir() else [ruta]
+        for archivo in archivos:
+            print(f"{archivo} -> {convertir(archivo, args.eliminar)}")
@@ -0,0 +1,212 @@
+import argparse
+import sqlite3
+from pathlib import Path
+
+import pandas as pd
+
+from Almacenamiento import listar_archivos_db, leer_archivo_db, EXTENSION_PARCIAL
+
+# Almacenamiento alternativo a los archivos DB_*: una base SQLite con todos
+# los temas, indexada por fecha, usuario y tema. Se activa en el scraper con
+# "almacenamiento": "sqlite" en config_scraper.json; el análisis la usa para
+# las carpetas de tema que no tienen archivos DB_* propios.
+ARCHIVO_SQLITE = Path("DB") / "tweets.sqlite"
+
+COLUMNAS = ['ID', 'Fecha', 'Usuario', 'Texto', 'Likes', 'Retweets', 'Respuestas', 'Idioma', 'Tema', 'Año']
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS temas (
+    id INTEGER PRIMARY KEY,
+    nombre TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS tweets (
+    tema_id INTEGER NOT NULL REFERENCES temas (id),
+    ID INTEGER NOT NULL,
+    Fecha TEXT NOT NULL,
+    Usuario TEXT,
+    Texto TEXT,
+    Likes INTEGER,
+    Retweets INTEGER,
+    Respuestas INTEGER,
+    Idioma TEXT,
+    Tema TEXT,
+    "Año" TEXT,
+    PRIMARY KEY (tema_id, ID)
+);
+CREATE INDEX IF NOT EXISTS tweets_tema_fecha ON tweets (tema_id, Fecha);
+CREATE INDEX IF NOT EXISTS tweets_fecha ON tweets (Fecha);
+CREATE INDEX IF NOT EXISTS tweets_usuario ON tweets (Usuario);
+"""
+
+
+def _texto_fecha(fecha):
+    # Fecha se guarda como texto "YYYY-MM-DD HH:MM:SS", que ordena igual que la fecha
+    return fecha.isoformat(sep=' ') if hasattr(fecha, 'hour') else str(fecha)
+
+
+class BaseTweets:
+    """Tweets de todos los temas en una base SQLite
+
+    Un tema es una carpeta de DB/ (su nombre); un mismo tweet se guarda una
+    sola vez por tema. Las consultas filtran por tema, fechas y usuario en
+    SQL usando los índices, así solo se lee la parte que se va a analizar.
+    """
+
+    def __init__(self, ruta=ARCHIVO_SQLITE):
+        self.ruta = Path(ruta)
+        self.ruta.parent.mkdir(parents=True, exist_ok=True)
+        self._conexion = sqlite3.connect(self.ruta, timeout=30)
+        self._conexion.execute("PRAGMA journal_mode=WAL")
+        with self._conexion:
+            self._conexion.executescript(ESQUEMA)
+
+    def temas(self):
+        return [fila[0] for fila in self._conexion.execute("SELECT nombre FROM temas ORDER BY nombre")]
+
+    def _id_tema(self, tema, crear=False):
+        fila = self._conexion.execute("SELECT id FROM temas WHERE nombre = ?", (tema,)).fetchone()
+        if fila is None and crear:
+            return self._conexion.execute("INSERT INTO temas (nombre) VALUES (?)", (tema,)).lastrowid
+        return fila[0] if fila else None
+
+    def insertar(self, tema, filas):
+        """Inserta un lote de tweets en una sola transacción
+
+        Devuelve cuántos eran nuevos (los repetidos en el tema se ignoran).
+        """
+        columnas = ", ".join(f'"{c}"' for c in COLUMNAS)
+        marcadores = ", ".join("?" * (len(COLUMNAS) + 1))
+        with self._conexion:
+            tema_id = self._id_tema(tema, crear=True)
+            antes = self._conexion.total_changes
+            self._conexion.executemany(
+                f"INSERT OR IGNORE INTO tweets (tema_id, {columnas}) VALUES ({marcadores})",
+                ([tema_id] + [fila.get(c) for c in COLUMNAS] for fila in filas))
+            return self._conexion.total_changes - antes
+
+    def contiene(self, tema, id_tweet):
+        fila = self._conexion.execute(
+            "SELECT 1 FROM tweets WHERE tema_id = (SELECT id FROM temas WHERE nombre = ?) AND ID = ?",
+            (tema, int(id_tweet))).fetchone()
+        return fila is not None
+
+    def _filtro(self, tema, desde, hasta, usuario):
+        condiciones, parametros = ["tema_id = ?"], [self._id_tema(tema)]
+        if desde is not None:
+            condiciones.append("Fecha >= ?")
+            parametros.append(_texto_fecha(desde))
+        if hasta is not None:
+            condiciones.append("Fecha < ?")
+            parametros.append(_texto_fecha(hasta))
+        if usuario is not None:
+            condiciones.append("Usuario = ?")
+            parametros.append(usuario)
+        return " AND ".join(condiciones), parametros
+
+    def cargar(self, tema, columnas=None, desde=None, hasta=None, usuario=None):
+        """Tweets de un tema como DataFrame, con las mismas columnas que un DB_*
+
+        `desde` es inclusivo y `hasta` exclusivo (fechas o textos ISO).
+        """
+        columnas = columnas or COLUMNAS
+        where, parametros = self._filtro(tema, desde, hasta, usuario)
+        seleccion = ", ".join(f'"{c}"' for c in columnas)
+        return pd.read_sql_query(f"SELECT {seleccion} FROM tweets WHERE {where} ORDER BY Fecha, ID",
+                                 self._conexion, params=parametros)
+
+    def contar(self, tema, desde=None, hasta=None, usuario=None):
+        where, parametros = self._filtro(tema, desde, hasta, usuario)
+        return self._conexion.execute(f"SELECT COUNT(*) FROM tweets WHERE {where}", parametros).fetchone()[0]
+
+    def cerrar(self):
+        self._conexion.close()
+
+
+def base_para_tema(tema_path, ruta=ARCHIVO_SQLITE):
+    """BaseTweets a usar para analizar `tema_path`, o None si se usan sus archivos DB_*"""
+    if listar_archivos_db(tema_path) or not Path(ruta).exists():
+        return None
+    base = BaseTweets(ruta)
+    if Path(tema_path).name in base.temas():
+        return base
+    base.cerrar()
+    return None
+
+
+class EscritorSQLite:
+    """Misma interfaz que EscritorPorLotes, pero insertando en una BaseTweets
+
+    Cada lote completo se inserta en una transacción; lo insertado ya está
+    a salvo, así que no hay nada que consolidar al cerrar. Se crea en el
+    hilo que va a usarlo (las conexiones SQLite no se comparten entre hilos).
+    """
+
+    def __init__(self, ruta, tema, tamaño_lote=500, al_guardar=None, total=0):
+        self.base = BaseTweets(ruta)
+        self.ruta = self.base.ruta
+        self.tema = tema
+        self.tamaño_lote = tamaño_lote
+        self.al_guardar = al_guardar
+        self.total = total
+        self._lote = []
+
+    def __contains__(self, id_tweet):
+        """El tweet ya está guardado en este tema"""
+        return self.base.contiene(self.tema, id_tweet)
+
+    def agregar(self, fila):
+        self._lote.append(fila)
+        self.total += 1
+        if len(self._lote) >= self.tamaño_lote:
+            self._vaciar()
+
+    def _vaciar(self):
+        if self._lote:
+            self.base.insertar(self.tema, self._lote)
+            if self.al_guardar:
+                self.al_guardar(self._lote)
+            self._lote = []
+
+    def ids_guardados(self):
+        # Los repetidos se consultan en la base (ver __contains__)
+        return set()
+
+    def sincronizar(self):
+        self._vaciar()
+
+    def cerrar(self, consolidar=True):
+        """Inserta el último lote; devuelve la ruta de la base, o None si no se guardó nada"""
+        self._vaciar()
+        self.base.cerrar()
+        return self.ruta if self.total else None
+
+
+def importar_carpeta(carpeta, ruta=ARCHIVO_SQLITE):
+    """Copia a la base los DB_* de `carpeta` y de sus subcarpetas, un tema por carpeta"""
+    base = BaseTweets(ruta)
+    importados = {}
+    try:
+        carpetas = [Path(carpeta)] + sorted(p for p in Path(carpeta).rglob("*")
+                                            if p.is_dir() and not p.name.startswith('.')
+                                            and p.suffix != EXTENSION_PARCIAL)
+        for tema_path in carpetas:
+            for archivo in listar_archivos_db(tema_path):
+                datos = leer_archivo_db(archivo).reindex(columns=COLUMNAS)
+                if pd.api.types.is_datetime64_any_dtype(datos['Fecha']):
+                    datos['Fecha'] = datos['Fecha'].dt.strftime("%Y-%m-%d %H:%M:%S")
+                filas = datos.astype(object).where(datos.notna(), None)
+                nuevos = base.insertar(tema_path.name, filas.to_dict('records'))
+                importados[tema_path.name] = importados.get(tema_path.name, 0) + nuevos
+    finally:
+        base.cerrar()
+    return importados
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Importa los archivos DB_* a la base SQLite")
+    parser.add_argument("carpeta", nargs="?", default="DB", help="Carpeta a importar (con sus subcarpetas)")
+    parser.add_argument("--base", default=str(ARCHIVO_SQLITE), help="Ruta de la base SQLite")
+    args = parser.parse_args()
+
+    for tema, nuevos in importar_carpeta(args.carpeta, args.base).items():
+        print(f"{tema}: {nuevos} tweets nuevos")
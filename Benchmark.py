@@ -0,0 +1,300 @@
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from Almacenamiento import guardar_tweets, CacheArchivos, EscritorPorLotes, ARCHIVO_INDICE_IDS
+from BusquedaSimulada import APISimulada
+from MotorAnalisis import PipelineAnalisis, ETAPAS
+from MotorScraping import buscar_por_ventanas, PlanificadorCuotas
+
+# Benchmark del análisis sin interfaz gráfica sobre carpetas de tema sintéticas
+# con el mismo esquema que genera el scraper:
+#
+#   python Benchmark.py                                   # 1k, 10k y 100k filas
+#   python Benchmark.py --tamaños 1000 1000000 --salida bench.json
+#   python Benchmark.py --comparar benchmark_base.json    # código 1 si hay regresiones
+#   python Benchmark.py --scraping 10000 100000           # scraper contra BusquedaSimulada
+
+TAMAÑOS = [1_000, 10_000, 100_000, 1_000_000]
+TAMAÑOS_POR_DEFECTO = [1_000, 10_000, 100_000]
+VERSION_RESULTADOS = 1
+
+# Escenarios medidos para cada tamaño
+#   frio:        sin caché de archivos ni estado guardado (primer análisis)
+#   caliente:    cálculo completo con la caché de archivos ya llena
+#   incremental: sin archivos nuevos desde el análisis anterior
+ESCENARIOS = ['frio', 'caliente', 'incremental']
+
+# Medidas de tiempo del scraping que se comparan con la base
+#   busqueda:      de la primera petición a tener todos los tweets en el escritor
+#   escritura:     tiempo del hilo de escritura guardando lotes
+#   consolidacion: unir los lotes en el DB_* definitivo
+MEDIDAS_SCRAPING = ['busqueda', 'escritura', 'consolidacion']
+
+# Ruido de medida por debajo del cual no se considera regresión
+UMBRAL_RUIDO = 0.05
+
+PALABRAS_POSITIVAS = ['good', 'great', 'love', 'happy', 'excellent', 'amazing', 'best', 'nice',
+                      'awesome', 'fantastic', 'wonderful', 'win', 'beautiful', 'fun', 'thanks']
+PALABRAS_NEGATIVAS = ['bad', 'terrible', 'hate', 'sad', 'awful', 'worst', 'angry', 'fail',
+                      'horrible', 'ugly', 'boring', 'problem', 'broken', 'lose', 'wrong']
+
+
+def _vocabulario(tamaño, rng):
+    silabas = np.array(['ta', 're', 'mo', 'li', 'cu', 'sa', 'ne', 'po', 'di', 'ga', 'ver', 'ton',
+                        'pla', 'cro', 'mes', 'dar', 'fin', 'ol', 'us', 'in'])
+    palabras = set()
+    while len(palabras) < tamaño:
+        palabras.add(''.join(rng.choice(silabas, rng.integers(2, 4))))
+    return np.array(sorted(palabras))
+
+
+def generar_corpus(filas, tema="benchmark", año=2024, semilla=0):
+    """DataFrame sintético con las columnas de un DB_* y una distribución parecida a la real
+
+    Palabras con frecuencia Zipf, parte de los tweets con palabras de
+    sentimiento, hashtags, menciones y URLs, y un 15% de textos repetidos
+    (retweets) para que la memoización de sentimientos tenga efecto.
+    """
+    rng = np.random.default_rng(semilla)
+    vocabulario = _vocabulario(5000, rng)
+    hashtags = np.array([f"#{p}" for p in vocabulario[:200]])
+    usuarios = np.array([f"usuario{i}" for i in range(max(filas // 20, 10))])
+
+    pesos = 1 / np.arange(1, len(vocabulario) + 1)
+    pesos /= pesos.sum()
+    largos = rng.integers(6, 30, filas)
+    palabras = rng.choice(vocabulario, largos.sum(), p=pesos)
+    limites = np.concatenate([[0], np.cumsum(largos)])
+
+    sentimiento = rng.random(filas)
+    con_hashtag = rng.random(filas) < 0.2
+    con_mencion = rng.random(filas) < 0.15
+    con_url = rng.random(filas) < 0.1
+    positivas = rng.choice(PALABRAS_POSITIVAS, filas)
+    negativas = rng.choice(PALABRAS_NEGATIVAS, filas)
+    etiquetas = rng.choice(hashtags, filas)
+    menciones = rng.choice(usuarios, filas)
+
+    textos = []
+    for i in range(filas):
+        partes = list(palabras[limites[i]:limites[i + 1]])
+        if sentimiento[i] < 0.3:
+            partes.insert(len(partes) // 2, positivas[i])
+        elif sentimiento[i] < 0.5:
+            partes.insert(len(partes) // 2, negativas[i])
+        if con_hashtag[i]:
+            partes.append(etiquetas[i])
+        if con_mencion[i]:
+            partes.insert(0, f"@{menciones[i]}")
+        if con_url[i]:
+            partes.append(f"https://t.co/{i:08x}")
+        textos.append(' '.join(partes))
+    textos = np.array(textos, dtype=object)
+    repetidos = rng.random(filas) < 0.15
+    textos[repetidos] = textos[rng.integers(0, filas, repetidos.sum())]
+
+    inicio = pd.Timestamp(f"{año}-01-01")
+    segundos = np.sort(rng.integers(0, 365 * 24 * 3600, filas))
+    fechas = (inicio + pd.to_timedelta(segundos, unit='s')).strftime("%Y-%m-%d %H:%M:%S")
+
+    return pd.DataFrame({
+        'ID': 1_700_000_000_000_000_000 + rng.permutation(filas * 3)[:filas],
+        'Fecha': fechas,
+        'Usuario': rng.choice(usuarios, filas),
+        'Texto': textos,
+        'Likes': rng.negative_binomial(1, 0.05, filas),
+        'Retweets': rng.negative_binomial(1, 0.2, filas),
+        'Respuestas': rng.negative_binomial(1, 0.3, filas),
+        'Idioma': 'en',
+        'Tema': tema,
+        'Año': str(año)
+    })
+
+
+def preparar_carpeta(raiz, filas, archivos=4, semilla=0):
+    """Crea (o reutiliza) raiz/bench_{filas}/ con el corpus repartido en varios DB_*"""
+    carpeta = Path(raiz) / f"bench_{filas}"
+    marca = carpeta / ".corpus.json"
+    descripcion = {"filas": filas, "archivos": archivos, "semilla": semilla}
+    if marca.exists() and json.loads(marca.read_text()) == descripcion:
+        return carpeta
+
+    if carpeta.exists():
+        shutil.rmtree(carpeta)
+    carpeta.mkdir(parents=True)
+    datos = generar_corpus(filas, semilla=semilla)
+    for n, parte in enumerate(np.array_split(np.arange(filas), archivos), start=1):
+        guardar_tweets(datos.iloc[parte], carpeta / f"DB_{n}_benchmark_2024.parquet")
+    marca.write_text(json.dumps(descripcion))
+    return carpeta
+
+
+def _limpiar(carpeta):
+    """Deja la carpeta como recién scrapeada: sin caché, estado ni índice de IDs"""
+    CacheArchivos(carpeta).invalidar()
+    (Path(carpeta) / ARCHIVO_INDICE_IDS).unlink(missing_ok=True)
+
+
+def _ejecutar(carpeta, salida, workers, incremental):
+    pipeline = PipelineAnalisis(carpeta, workers=workers, carpeta_salida=salida, incremental=incremental)
+    inicio = time.perf_counter()
+    pipeline.ejecutar()
+    tiempos = dict(pipeline.tiempos)
+    tiempos['total'] = time.perf_counter() - inicio
+    return tiempos
+
+
+def medir(carpeta, workers=None):
+    """Tiempos por etapa de cada escenario sobre una carpeta sintética"""
+    resultados = {}
+    with tempfile.TemporaryDirectory() as salida:
+        _limpiar(carpeta)
+        resultados['frio'] = _ejecutar(carpeta, salida, workers, incremental=True)
+        resultados['caliente'] = _ejecutar(carpeta, salida, workers, incremental=False)
+        resultados['incremental'] = _ejecutar(carpeta, salida, workers, incremental=True)
+    return resultados
+
+
+def medir_scraping(tweets, latencia=0.0, tamaño_pagina=20, tasa_fallos=0.0, concurrencia=4):
+    """Scraping de `tweets` tweets contra la búsqueda simulada, sin red ni límites de cuota
+
+    Devuelve tiempos, tweets por segundo y pico de memoria de Python
+    (tracemalloc, que también cuenta el hilo de escritura).
+    """
+    api = APISimulada(cuentas=concurrencia, latencia=latencia, tamaño_pagina=tamaño_pagina,
+                      peticiones_por_cuenta=10 ** 9, tasa_fallos=tasa_fallos,
+                      tweets_por_dia=math.ceil(tweets / 365) + 1)
+    planificador = PlanificadorCuotas(api.pool, peticiones_por_cuenta=10 ** 9)
+    with tempfile.TemporaryDirectory() as carpeta:
+        tracemalloc.start()
+        try:
+            escritor = EscritorPorLotes(Path(carpeta) / "DB_1_benchmark_2024.parquet")
+            inicio = time.perf_counter()
+            total = asyncio.run(buscar_por_ventanas(api, "benchmark", "en", 2024, tweets, escritor,
+                                                    concurrencia=concurrencia, planificador=planificador))
+            escritor.sincronizar()
+            busqueda = time.perf_counter() - inicio
+            inicio = time.perf_counter()
+            escritor.cerrar()
+            consolidacion = time.perf_counter() - inicio
+            _, pico = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+    return {
+        "tweets": total,
+        "peticiones": api.peticiones,
+        "tweets_por_segundo": total / busqueda if busqueda else 0.0,
+        "memoria_pico_mb": pico / 2 ** 20,
+        "busqueda": busqueda,
+        "escritura": escritor.segundos_escritura,
+        "consolidacion": consolidacion
+    }
+
+
+def comparar(actual, base):
+    """Filas (tamaño, escenario, etapa, base, actual, cociente) de lo medido en ambos
+
+    Ver es_regresion para decidir cuáles son regresiones.
+    """
+    filas = []
+    for tamaño, escenarios in actual["resultados"].items():
+        for escenario, tiempos in escenarios.items():
+            previos = base.get("resultados", {}).get(tamaño, {}).get(escenario, {})
+            for etapa, segundos in tiempos.items():
+                if etapa in previos and previos[etapa] > 0:
+                    filas.append((tamaño, escenario, etapa, previos[etapa], segundos,
+                                  segundos / previos[etapa]))
+    for tweets, medidas in actual.get("scraping", {}).items():
+        previas = base.get("scraping", {}).get(tweets, {})
+        for medida in MEDIDAS_SCRAPING:
+            if previas.get(medida, 0) > 0:
+                filas.append((tweets, "scraping", medida, previas[medida], medidas[medida],
+                              medidas[medida] / previas[medida]))
+    return filas
+
+
+def es_regresion(fila, tolerancia):
+    """Tarda más de (1 + tolerancia) veces lo de la base y la diferencia no es ruido"""
+    _, _, _, base, actual, cociente = fila
+    return cociente > 1 + tolerancia and actual - base > UMBRAL_RUIDO
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark del análisis con corpus sintéticos")
+    parser.add_argument("--tamaños", type=int, nargs="+", default=None,
+                        help=f"Filas de cada corpus (habituales: {' '.join(map(str, TAMAÑOS))}); "
+                             f"por defecto {' '.join(map(str, TAMAÑOS_POR_DEFECTO))} si no se pide --scraping")
+    parser.add_argument("--datos", default=".benchmark", help="Carpeta donde se generan y reutilizan los corpus")
+    parser.add_argument("--workers", type=int, default=None, help="Procesos de carga y gráficos")
+    parser.add_argument("--salida", default="benchmark.json", help="Archivo JSON de resultados")
+    parser.add_argument("--comparar", help="JSON de una ejecución anterior que sirve de referencia")
+    parser.add_argument("--tolerancia", type=float, default=0.2,
+                        help="Aumento relativo permitido antes de marcar una regresión")
+    parser.add_argument("--scraping", type=int, nargs="+", default=[],
+                        help="Mide el scraper descargando estos números de tweets de la búsqueda simulada")
+    parser.add_argument("--latencia", type=float, default=0.0, help="Segundos por página de la búsqueda simulada")
+    parser.add_argument("--pagina", type=int, default=20, help="Tweets por página de la búsqueda simulada")
+    parser.add_argument("--fallos", type=float, default=0.0, help="Probabilidad de fallo de red por página")
+    parser.add_argument("--concurrencia", type=int, default=4, help="Ventanas buscadas a la vez")
+    args = parser.parse_args(argv)
+    if args.tamaños is None:
+        args.tamaños = [] if args.scraping else TAMAÑOS_POR_DEFECTO
+
+    resultados = {
+        "version": VERSION_RESULTADOS,
+        "fecha": datetime.now().isoformat(timespec='seconds'),
+        "maquina": {"python": platform.python_version(), "sistema": platform.platform(),
+                    "cpus": os.cpu_count()},
+        "etapas": [clave for clave, _ in ETAPAS],
+        "resultados": {},
+        "scraping": {}
+    }
+    for filas in args.tamaños:
+        print(f"Generando corpus de {filas} filas...")
+        carpeta = preparar_carpeta(args.datos, filas)
+        print(f"Midiendo {filas} filas...")
+        resultados["resultados"][str(filas)] = medir(carpeta, args.workers)
+        for escenario, tiempos in resultados["resultados"][str(filas)].items():
+            detalle = ", ".join(f"{etapa} {segundos:.2f}s" for etapa, segundos in tiempos.items())
+            print(f"  {escenario:<12} {detalle}")
+    for tweets in args.scraping:
+        print(f"Midiendo scraping de {tweets} tweets...")
+        medidas = medir_scraping(tweets, args.latencia, args.pagina, args.fallos, args.concurrencia)
+        resultados["scraping"][str(tweets)] = medidas
+        print(f"  {medidas['tweets_por_segundo']:.0f} tweets/s, pico de memoria {medidas['memoria_pico_mb']:.1f} MB, "
+              f"búsqueda {medidas['busqueda']:.2f}s, escritura {medidas['escritura']:.2f}s, "
+              f"consolidación {medidas['consolidacion']:.2f}s")
+
+    Path(args.salida).write_text(json.dumps(resultados, indent=2, ensure_ascii=False), encoding="utf-8")
+    print(f"Resultados guardados en {args.salida}")
+
+    if not args.comparar:
+        return 0
+    base = json.loads(Path(args.comparar).read_text(encoding="utf-8"))
+    regresiones = 0
+    print(f"\nComparación con {args.comparar} ({base.get('fecha', '?')}):")
+    for fila in comparar(resultados, base):
+        tamaño, escenario, etapa, previo, actual, cociente = fila
+        marca = "  ❌ regresión" if es_regresion(fila, args.tolerancia) else ""
+        regresiones += bool(marca)
+        print(f"  {tamaño:>8} {escenario:<12} {etapa:<18} {previo:8.3f}s -> {actual:8.3f}s "
+              f"(x{cociente:.2f}){marca}")
+    return 1 if regresiones else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
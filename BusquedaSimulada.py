@@ -0,0 +1,150 @@
+import asyncio
+import random
+import re
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+from twscrape import NoAccountError
+
+from MotorScraping import COLA_BUSQUEDA
+
+# Búsqueda de Twitter simulada, sin red ni cuentas reales: implementa la parte
+# de twscrape.API que usa el scraper (search() y el pool de cuentas) con
+# latencia, tamaño de página, límites por cuenta y fallos configurables.
+# Sirve para medir el scraper (ver Benchmark.py --scraping) y para probar
+# la interfaz sin conexión con "busqueda_simulada" en config_scraper.json.
+
+PALABRAS = ['tema', 'nuevo', 'hoy', 'gran', 'datos', 'red', 'video', 'foto', 'hilo', 'noticia',
+            'good', 'great', 'love', 'bad', 'hate', 'terrible', 'happy', 'sad', 'best', 'worst']
+INICIO_IDS = datetime(2010, 11, 4, tzinfo=timezone.utc)
+
+
+def id_de_fecha(fecha, secuencia=0):
+    """ID creciente con la fecha, como los de Twitter: max_id sirve para paginar hacia atrás"""
+    milisegundos = int((fecha - INICIO_IDS).total_seconds() * 1000)
+    return (milisegundos << 22) + secuencia
+
+
+@dataclass
+class CuentaSimulada:
+    username: str
+    active: bool = True
+    locks: dict = field(default_factory=dict)  # cola -> datetime hasta la que está bloqueada
+    stats: dict = field(default_factory=dict)  # cola -> peticiones hechas
+    usadas: int = 0  # Peticiones en el periodo de límite actual
+
+
+class PoolSimulado:
+    """Mismo interfaz que twscrape.AccountsPool en lo que usa el scraper"""
+
+    def __init__(self, cuentas, peticiones_por_cuenta, segundos_limite):
+        self.cuentas = [CuentaSimulada(f"simulada{i + 1}") for i in range(cuentas)]
+        self.peticiones_por_cuenta = peticiones_por_cuenta
+        self.segundos_limite = segundos_limite
+
+    async def add_account(self, username, *args, **kwargs):
+        if all(c.username != username for c in self.cuentas):
+            self.cuentas.append(CuentaSimulada(username))
+
+    async def login_all(self, usernames=None):
+        return {"total": 0, "success": 0, "failed": 0}
+
+    async def get_all(self):
+        # Copias, como las que twscrape lee de su base
+        return [CuentaSimulada(c.username, c.active, dict(c.locks), dict(c.stats)) for c in self.cuentas]
+
+    async def accounts_info(self):
+        return [{"username": c.username, "active": c.active, "logged_in": True} for c in self.cuentas]
+
+    def tomar(self, cola):
+        ahora = datetime.now(timezone.utc)
+        for cuenta in self.cuentas:
+            bloqueo = cuenta.locks.get(cola)
+            if cuenta.active and (bloqueo is None or bloqueo < ahora):
+                if bloqueo is not None:
+                    cuenta.usadas = 0  # El bloqueo por límite venció: cuota entera
+                # Bloqueo mientras está en uso, igual que twscrape
+                cuenta.locks[cola] = ahora + timedelta(minutes=15)
+                return cuenta
+        raise NoAccountError(f"No account available for queue {cola}")
+
+    def soltar(self, cuenta, cola, limitada=False):
+        if limitada:
+            cuenta.locks[cola] = datetime.now(timezone.utc) + timedelta(seconds=self.segundos_limite)
+        else:
+            cuenta.locks.pop(cola, None)
+
+
+class APISimulada:
+    """Sustituto de twscrape.API para búsquedas sin conexión
+
+    latencia: segundos por página; tamaño_pagina: tweets por página
+    peticiones_por_cuenta / segundos_limite: límite de la API por cuenta
+    tasa_fallos: probabilidad de error de red en cada página
+    tweets_por_dia: volumen de resultados de cualquier búsqueda
+    """
+
+    def __init__(self, cuentas=3, latencia=0.05, tamaño_pagina=20, peticiones_por_cuenta=50,
+                 segundos_limite=900, tasa_fallos=0.0, tweets_por_dia=100, semilla=0):
+        self.pool = PoolSimulado(cuentas, peticiones_por_cuenta, segundos_limite)
+        self.latencia = latencia
+        self.tamaño_pagina = tamaño_pagina
+        self.tasa_fallos = tasa_fallos
+        self.tweets_por_dia = tweets_por_dia
+        self.semilla = semilla
+        self._azar = random.Random(semilla)
+        self.peticiones = 0
+
+    def _tweets(self, desde, hasta, max_id):
+        """Tweets de [desde, hasta) del más reciente al más antiguo, siempre los mismos"""
+        intervalo = timedelta(days=1) / self.tweets_por_dia
+        fecha = hasta - intervalo
+        n = int((hasta - desde) / intervalo)
+        for i in range(n):
+            id_tweet = id_de_fecha(fecha)
+            if max_id is None or id_tweet <= max_id:
+                azar = random.Random(id_tweet ^ self.semilla)
+                yield SimpleNamespace(
+                    id=id_tweet,
+                    date=fecha,
+                    user=SimpleNamespace(username=f"usuario{azar.randrange(1000)}"),
+                    rawContent=' '.join(azar.choices(PALABRAS, k=azar.randint(5, 20))),
+                    likeCount=azar.randrange(500),
+                    retweetCount=azar.randrange(100),
+                    replyCount=azar.randrange(50)
+                )
+            fecha -= intervalo
+
+    async def search(self, q, limit=-1):
+        fechas = re.search(r"since:(\S+) until:(\S+)", q)
+        max_id = re.search(r"max_id:(\d+)", q)
+        desde = datetime.fromisoformat(fechas[1]).replace(tzinfo=timezone.utc)
+        hasta = datetime.fromisoformat(fechas[2]).replace(tzinfo=timezone.utc)
+        tweets = self._tweets(desde, hasta, int(max_id[1]) if max_id else None)
+
+        cuenta = self.pool.tomar(COLA_BUSQUEDA)
+        entregados = 0
+        try:
+            while limit < 0 or entregados < limit:
+                if cuenta.usadas >= self.pool.peticiones_por_cuenta:
+                    # Límite alcanzado: twscrape cambia de cuenta o se queda sin ninguna
+                    self.pool.soltar(cuenta, COLA_BUSQUEDA, limitada=True)
+                    cuenta = None
+                    cuenta = self.pool.tomar(COLA_BUSQUEDA)
+                await asyncio.sleep(self.latencia)
+                self.peticiones += 1
+                cuenta.usadas += 1
+                cuenta.stats[COLA_BUSQUEDA] = cuenta.stats.get(COLA_BUSQUEDA, 0) + 1
+                if self._azar.random() < self.tasa_fallos:
+                    raise ConnectionError("Fallo de red simulado")
+
+                pagina = [t for _, t in zip(range(self.tamaño_pagina), tweets)]
+                if not pagina:
+                    return
+                for tweet in pagina:
+                    yield tweet
+                    entregados += 1
+        finally:
+            if cuenta is not None:
+                self.pool.soltar(cuenta, COLA_BUSQUEDA)
@@ -0,0 +1,95 @@
+import argparse
+import importlib
+import re
+import subprocess
+import sys
+import threading
+
+# Carga diferida de las dependencias pesadas (pandas, matplotlib, nltk,
+# twscrape...). Las ventanas solo importan tkinter al arrancar; cada módulo
+# pesado se importa dentro de la función que lo usa y, para que el primer uso
+# no espere, precargar() los importa en un hilo en cuanto la ventana se pinta.
+# Si el usuario los necesita antes de que termine, el import de Python espera
+# a que el hilo acabe ese módulo (es seguro entre hilos).
+#
+# Medir el tiempo de arranque de cada ventana (un intérprete nuevo por módulo):
+#
+#   python CargaDiferida.py                          # Menu, Analisis, Predicciones, RecopilacionDeTweets
+#   python CargaDiferida.py Analisis --presupuesto 0.3
+MODULOS_INTERFAZ = ['Menu', 'Analisis', 'Predicciones', 'RecopilacionDeTweets']
+
+# Presupuesto por defecto de importación de un módulo de interfaz, en segundos
+PRESUPUESTO_ARRANQUE = 0.5
+
+
+def precargar(root, modulos, al_terminar=None):
+    """Importa `modulos` en un hilo en segundo plano cuando Tk queda libre
+
+    Si un módulo declara su propia lista MODULOS_PESADOS, también se
+    precargan. Un módulo que no se pueda importar se ignora aquí: el error
+    aparecerá, con su mensaje, cuando se use. `al_terminar()` se llama desde Tk.
+    """
+    def importar():
+        pendientes = list(modulos)
+        while pendientes:
+            try:
+                modulo = importlib.import_module(pendientes.pop(0))
+            except Exception:
+                continue
+            pendientes.extend(getattr(modulo, 'MODULOS_PESADOS', []))
+        if al_terminar:
+            root.after(0, al_terminar)
+
+    root.after_idle(lambda: threading.Thread(target=importar, daemon=True).start())
+
+
+def medir_importacion(modulo):
+    """Segundos que tarda `import modulo` en un intérprete nuevo y sus importaciones más caras
+
+    Devuelve (total, [(segundos, nombre), ...]) con las importaciones directas
+    del módulo ordenadas de más a menos cara.
+    """
+    resultado = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {modulo}"],
+                               capture_output=True, text=True)
+    if resultado.returncode != 0:
+        raise RuntimeError(resultado.stderr.strip().splitlines()[-1])
+
+    # Cada import se escribe al terminar, después de los suyos y con un nivel
+    # más de sangría que quien lo importó
+    total, directas, pendientes = 0.0, [], []
+    for linea in resultado.stderr.splitlines():
+        coincidencia = re.match(r"import time:\s+\d+ \|\s+(\d+) \|( *)(\S+)", linea)
+        if not coincidencia:
+            continue
+        acumulado, sangria, nombre = coincidencia.groups()
+        segundos = int(acumulado) / 1e6
+        if len(sangria) == 1:
+            if nombre == modulo:
+                total, directas = segundos, pendientes
+            pendientes = []
+        elif len(sangria) == 3:
+            pendientes.append((segundos, nombre))
+    return total, sorted(directas, reverse=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tiempo de importación de los módulos de interfaz")
+    parser.add_argument("modulos", nargs="*", default=MODULOS_INTERFAZ, help="Módulos a medir")
+    parser.add_argument("--presupuesto", type=float, default=PRESUPUESTO_ARRANQUE,
+                        help="Segundos permitidos por módulo; termina con código 1 si alguno los supera")
+    parser.add_argument("--detalle", type=int, default=5, help="Importaciones más caras a mostrar por módulo")
+    args = parser.parse_args(argv)
+
+    excedidos = 0
+    for modulo in args.modulos:
+        total, directas = medir_importacion(modulo)
+        marca = "  ❌ supera el presupuesto" if total > args.presupuesto else ""
+        excedidos += bool(marca)
+        print(f"{modulo:<22} {total:6.3f}s{marca}")
+        for segundos, nombre in directas[:args.detalle]:
+            print(f"    {nombre:<30} {segundos:6.3f}s")
+    return 1 if excedidos else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,92 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from matplotlib.figure import Figure
+from wordcloud import WordCloud, STOPWORDS
+
+# Cada gráfico se dibuja con la API orientada a objetos de matplotlib (Figure
+# propia, sin el estado global de pyplot) para poder generarlos a la vez en
+# procesos distintos. Las funciones reciben solo datos ya agregados.
+
+
+def grafico_tendencia(ruta, carpeta_tema, tendencia_mensual):
+    fig = Figure(figsize=(12, 6))
+    ax = fig.subplots()
+    tendencia_mensual.plot(kind='line', marker='o', color='purple', ax=ax)
+    ax.set_title(f'Tendencia Mensual de Tweets - {carpeta_tema}')
+    ax.set_ylabel('Cantidad de Tweets')
+    ax.grid(True)
+    fig.savefig(ruta)
+
+
+def grafico_histograma(ruta, carpeta_tema, sentimientos):
+    fig = Figure(figsize=(10, 5))
+    ax = fig.subplots()
+    ax.hist(sentimientos, bins=20, color='skyblue', edgecolor='black')
+    ax.grid(True)
+    ax.set_title(f'Distribución de Sentimientos - {carpeta_tema}', pad=20)
+    ax.set_xlabel('Puntuación de Sentimiento')
+    ax.set_ylabel('Cantidad de Tweets')
+    ax.axvline(x=0.05, color='green', linestyle='--', label='Positivo')
+    ax.axvline(x=-0.05, color='red', linestyle='--', label='Negativo')
+    ax.legend()
+    fig.savefig(ruta, bbox_inches='tight')
+
+
+def grafico_pastel(ruta, carpeta_tema, sentimiento_counts):
+    fig = Figure(figsize=(8, 8))
+    ax = fig.subplots()
+    ax.pie(sentimiento_counts, labels=sentimiento_counts.index, autopct='%1.1f%%', startangle=140,
+           colors=['lightgreen', 'lightcoral', 'lightgray'])
+    ax.set_title(f'Comportamiento General del Tema - {carpeta_tema}')
+    ax.axis('equal')
+    fig.savefig(ruta, bbox_inches='tight')
+
+
+def grafico_boxplot(ruta, carpeta_tema, sentimientos):
+    """`sentimientos` es un DataFrame con las columnas Sentimiento y Categoria_Sentimiento"""
+    fig = Figure(figsize=(10, 6))
+    ax = fig.subplots()
+    sentimientos.boxplot(column='Sentimiento', by='Categoria_Sentimiento', grid=False, ax=ax,
+                         boxprops=dict(linestyle='-', linewidth=1.5, color='purple'),
+                         whiskerprops=dict(linestyle='-', linewidth=1.5, color='navy'),
+                         medianprops=dict(linestyle='-', linewidth=2, color='red'),
+                         capprops=dict(linestyle='-', linewidth=1.5, color='black'),
+                         flierprops=dict(marker='o', markersize=3, markerfacecolor='gray'))
+    ax.set_title(f'Distribución de Sentimientos - {carpeta_tema}')
+    fig.suptitle('')
+    ax.set_xlabel('Categoría de Sentimiento')
+    ax.set_ylabel('Puntuación de Sentimiento')
+    fig.savefig(ruta, bbox_inches='tight')
+
+
+def grafico_nube(ruta, carpeta_tema, frecuencias):
+    """`frecuencias` es {palabra: conteo}; con random_state fijo la nube es reproducible"""
+    frecuencias = {p: n for p, n in frecuencias.items() if p not in STOPWORDS}
+    wordcloud = WordCloud(width=1200, height=600, background_color='white', max_words=100,
+                          colormap='plasma', random_state=0).generate_from_frequencies(frecuencias)
+
+    fig = Figure(figsize=(14, 7))
+    ax = fig.subplots()
+    ax.imshow(wordcloud, interpolation='bilinear')
+    ax.axis('off')
+    ax.set_title(f'Nube de Palabras Relevantes - {carpeta_tema}', fontsize=16)
+    fig.savefig(ruta, bbox_inches='tight')
+
+
+def renderizar(tareas, workers=None):
+    """Genera los gráficos en paralelo, uno por proceso
+
+    `tareas` es una lista de (funcion, ruta, argumentos). Espera a que
+    terminen todos y relanza el primer error en el orden de la lista.
+    """
+    workers = min(workers or os.cpu_count() or 1, len(tareas))
+    if workers <= 1:
+        for funcion, ruta, argumentos in tareas:
+            funcion(ruta, *argumentos)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futuros = [pool.submit(funcion, ruta, *argumentos) for funcion, ruta, argumentos in tareas]
+        for futuro in futuros:
+            futuro.result()
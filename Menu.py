@@ -1,9 +1,18 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-import subprocess
-import sys
-import os
+import importlib
 from tkinter import font as tkfont
+from CargaDiferida import precargar
+
+# Herramientas del menú: (texto, módulo, clase de la aplicación, color).
+# Se abren como ventanas Toplevel del mismo proceso; sus módulos (y las
+# librerías pesadas que declaran) se precargan en cuanto el menú se pinta,
+# así abrir una herramienta no espera a importar pandas, matplotlib o nltk.
+HERRAMIENTAS = [
+    ("Análisis de datos", "Analisis", "TrendAnalysisApp", "#3498db"),
+    ("Obtener datos", "RecopilacionDeTweets", "TwitterScraperApp", "#2ba08b"),
+    ("Modelo de predicciones", "Predicciones", "TrendAnalyzerApp", "#ff9800"),
+]
 
 class MenuApp:
     def __init__(self, root):
@@ -11,6 +20,7 @@ class MenuApp:
         self.root.title("Sistema de Análisis de Datos")
         self.root.geometry("600x500")
         self.root.resizable(False, False)
+        self.ventanas = {}  # módulo -> Toplevel de la herramienta abierta
         
         # Configuración de estilo
         self.setup_style()
@@ -48,9 +58,8 @@ class MenuApp:
         subtitle.pack(pady=(10, 20))
         
         # Botones principales
-        self.create_button(button_frame, "Análisis de datos", "Analisis.py", "#3498db")
-        self.create_button(button_frame, "Obtener datos", "RecopilacionDeTweets.py", "#2ba08b")
-        self.create_button(button_frame, "Modelo de predicciones", "Predicciones.py", "#ff9800")
+        for texto, modulo, clase, color in HERRAMIENTAS:
+            self.create_button(button_frame, texto, modulo, clase, color)
         
         # Botón de salida
         exit_button = tk.Button(
@@ -77,6 +86,8 @@ class MenuApp:
             bg="#f5f6fa"
         )
         footer.pack(side=tk.BOTTOM, fill=tk.X, pady=10)
+        
+        precargar(self.root, [modulo for _, modulo, _, _ in HERRAMIENTAS])
     
     def setup_style(self):
         # Estilo para los botones
@@ -90,14 +101,14 @@ class MenuApp:
         text_font = tkfont.nametofont("TkTextFont")
         text_font.configure(family="Segoe UI", size=9)
     
-    def create_button(self, frame, text, script, color):
+    def create_button(self, frame, text, modulo, clase, color):
         btn_frame = tk.Frame(frame, bg="#ecf0f1")
         btn_frame.pack(pady=8, fill=tk.X, padx=40)
         
         button = tk.Button(
             btn_frame, 
             text=text, 
-            command=lambda: self.ejecutar_script(script),
+            command=lambda: self.abrir_herramienta(modulo, clase),
             bg=color,
             fg="white",
             font=("Montserrat", 11, "bold"),
@@ -115,21 +126,35 @@ class MenuApp:
         button.bind("<Enter>", lambda e: button.config(bg=self.lighten_color(color)))
         button.bind("<Leave>", lambda e: button.config(bg=color))
     
-    def ejecutar_script(self, ruta_script):
+    def abrir_herramienta(self, modulo, clase):
+        """Abre la herramienta en una ventana propia, sin bloquear el menú
+
+        Si ya está abierta, la trae al frente en lugar de abrir otra.
+        """
+        ventana = self.ventanas.get(modulo)
+        if ventana is not None and ventana.winfo_exists():
+            ventana.deiconify()
+            ventana.lift()
+            ventana.focus_force()
+            return
+        
+        ventana = None
         try:
-            if not os.path.exists(ruta_script):
-                messagebox.showerror("Error", f"Archivo no encontrado: {ruta_script}")
-                return
-                
-            # Usamos el mismo intérprete de Python que está ejecutando este script
-            subprocess.run([sys.executable, ruta_script], check=True)
-        except subprocess.CalledProcessError as e:
-            messagebox.showerror("Error", f"Error al ejecutar {ruta_script}: {e}")
+            aplicacion = getattr(importlib.import_module(modulo), clase)
+            ventana = tk.Toplevel(self.root)
+            self.ventanas[modulo] = ventana
+            aplicacion(ventana)
+        except Exception as e:
+            if ventana is not None:
+                ventana.destroy()
+            messagebox.showerror("Error", f"Error al abrir {modulo}: {e}")
     
     def confirm_exit(self):
+        abiertas = [v for v in self.ventanas.values() if v.winfo_exists()]
+        aviso = "\n\nSe cerrarán también las herramientas abiertas." if abiertas else ""
         if messagebox.askyesno(
             "Confirmar salida", 
-            "¿Está seguro que desea salir del sistema?",
+            f"¿Está seguro que desea salir del sistema?{aviso}",
             icon="question",
             default="no"
         ):
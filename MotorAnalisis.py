@@ -0,0 +1,405 @@
+import threading
+import time
+from contextlib import nullcontext
+from pathlib import Path
+
+import pandas as pd
+from nltk.sentiment import SentimentIntensityAnalyzer
+
+import Graficos
+import BaseConocimiento
+from ProcesamientoTexto import PuntuadorSentimiento, CorpusTokenizado
+from Almacenamiento import (listar_archivos_db, cargar_archivos_db, CacheArchivos, IndiceIds,
+                            COLUMNAS_ANALISIS, EXTENSION_PARCIAL)
+from Agregados import EstadoAgregado, ARCHIVO_ESTADO, firma_archivo, mas_comunes, categoria_sentimiento
+from Perfilador import PerfiladorEtapas, modo_de_entorno
+from RecursosNLTK import asegurar, RECURSOS_ANALISIS
+
+# Etapas del análisis en orden de ejecución: (clave, nombre para mostrar)
+ETAPAS = [
+    ('carga', "Carga de datos"),
+    ('sentimiento', "Análisis de sentimientos"),
+    ('agregados', "Cálculo de agregados"),
+    ('graficos', "Generación de gráficos"),
+    ('reporte', "Reporte"),
+    ('base_conocimiento', "Base de conocimiento"),
+]
+
+# Palabras que no se muestran en la nube
+JERGA_INTERNET = {'lol', 'omg', 'wtf', 'rofl', 'smh', 'tbh', 'btw', 'imo', 'imho', 'ftw'}
+STOPWORDS_ES = {'de', 'la', 'que', 'el', 'en', 'y', 'a', 'los', 'del', 'se'}
+
+
+class ErrorAnalisis(Exception):
+    """La carpeta no tiene datos que se puedan analizar"""
+
+
+class AnalisisCancelado(Exception):
+    """El usuario canceló el análisis entre dos etapas"""
+
+
+class PipelineAnalisis:
+    """Análisis completo de una carpeta de tema, dividido en etapas
+
+    No depende de Tk: se ejecuta en un hilo de trabajo y comunica su avance
+    con callbacks. Entre etapas comprueba `cancelado` (threading.Event) y
+    termina con AnalisisCancelado si está activo.
+
+    Con `incremental` (por defecto) se guarda un EstadoAgregado en la caché
+    de la carpeta y en cada ejecución solo se leen los DB_* nuevos; si algún
+    archivo ya procesado cambió o desapareció se recalcula todo. Los
+    resultados son los mismos que los de un cálculo completo.
+
+    Con `base` (BaseDatosSQLite.BaseTweets) los tweets del tema se leen de
+    la base en lugar de los archivos DB_*, filtrando en SQL por `desde`
+    (inclusivo) y `hasta` (exclusivo); en ese caso no hay estado incremental.
+
+    Con `perfil` ('resumen', 'cprofile' o True) se mide cada etapa y se
+    guarda profile_{tema}.json en la carpeta de salida (ver Perfilador);
+    por defecto lo decide la variable de entorno PERFIL_ANALISIS.
+
+    progreso(indice_etapa, total_etapas, mensaje)
+    advertencia(mensaje)  # archivos que no se pudieron leer
+    """
+
+    def __init__(self, tema_path, puntuador=None, workers=None, progreso=None,
+                 advertencia=None, cancelado=None, carpeta_salida=".", incremental=True,
+                 base=None, desde=None, hasta=None, perfil=None):
+        if base is None and (desde is not None or hasta is not None):
+            raise ValueError("El filtro por fechas solo está disponible con la base SQLite")
+        self.tema_path = Path(tema_path)
+        self.carpeta_tema = self.tema_path.name
+        self.puntuador = puntuador
+        self.workers = workers
+        self.progreso = progreso or (lambda indice, total, mensaje: None)
+        self.advertencia = advertencia or (lambda mensaje: None)
+        self.cancelado = cancelado or threading.Event()
+        self.carpeta_salida = Path(carpeta_salida)
+        self.incremental = incremental
+        self.base = base
+        self.desde = desde
+        self.hasta = hasta
+        self.ruta_estado = CacheArchivos(self.tema_path).carpeta / ARCHIVO_ESTADO
+        self.generated_files = []
+        self.estado = None
+        self.tiempos = {}  # clave de etapa -> segundos que tardó
+        self.perfil = modo_de_entorno() if perfil is None else ('resumen' if perfil is True else perfil or None)
+        self.ruta_perfil = None
+        self._etapa_actual = 0
+
+    def ejecutar(self):
+        """Ejecuta todas las etapas y devuelve la lista de (nombre, ruta) generados"""
+        perfilador = None
+        if self.perfil:
+            perfilador = PerfiladorEtapas(self.carpeta_tema, self.carpeta_salida, self.perfil)
+            perfilador.iniciar()
+        try:
+            for indice, (clave, nombre) in enumerate(ETAPAS):
+                if self.cancelado.is_set():
+                    raise AnalisisCancelado()
+                self._etapa_actual = indice
+                self._informar(f"{nombre}...")
+                inicio = time.perf_counter()
+                with perfilador.etapa(clave, nombre) if perfilador else nullcontext():
+                    getattr(self, f"_etapa_{clave}")()
+                    if perfilador:
+                        perfilador.filas(self._filas_etapa(clave))
+                self.tiempos[clave] = time.perf_counter() - inicio
+        finally:
+            # También se guarda el perfil de un análisis que falló o se canceló
+            if perfilador:
+                perfilador.terminar()
+                self.ruta_perfil = perfilador.guardar()
+        self.progreso(len(ETAPAS), len(ETAPAS), f"Análisis completado para {self.carpeta_tema}")
+        return self.generated_files
+
+    def _filas_etapa(self, clave):
+        """Filas que procesó una etapa, para el perfil"""
+        if clave in ('carga', 'sentimiento'):
+            return sum(len(datos) for datos in self.bloques.values())
+        return self.estado.total
+
+    def _informar(self, mensaje):
+        indice = self._etapa_actual
+        self.progreso(indice, len(ETAPAS), f"[{indice + 1}/{len(ETAPAS)}] {mensaje}")
+
+    def _ruta(self, nombre):
+        return str(self.carpeta_salida / nombre)
+
+    def _estado_previo(self, archivos):
+        """Estado guardado, si sigue siendo válido para los archivos actuales"""
+        if not self.incremental:
+            return None
+        estado = EstadoAgregado.cargar(self.ruta_estado)
+        if estado is None:
+            return None
+        actuales = {a.name: a for a in archivos}
+        for nombre, firma in estado.archivos.items():
+            if nombre not in actuales or firma_archivo(actuales[nombre]) != firma:
+                self._informar(f"{nombre} cambió desde el último análisis: se recalcula todo")
+                return None
+        return estado
+
+    def _etapa_carga(self):
+        if self.base is not None:
+            return self._cargar_de_base()
+
+        archivos = listar_archivos_db(self.tema_path)
+        if not archivos:
+            raise ErrorAnalisis(f"No se encontraron archivos DB_* en {self.tema_path}")
+
+        # El índice de IDs decide a qué archivo pertenece cada tweet; si hay que
+        # rehacerlo entero, los agregados guardados ya no sirven
+        indice = IndiceIds(self.tema_path)
+        desactualizados = indice.desactualizados(archivos)
+        if len(desactualizados) == len(archivos):
+            self.estado_previo = EstadoAgregado()
+        else:
+            self.estado_previo = self._estado_previo(archivos) or EstadoAgregado()
+        pendientes = [a for a in archivos if a.name not in self.estado_previo.archivos]
+        if len(pendientes) < len(archivos):
+            self._informar(f"{len(archivos) - len(pendientes)} archivos ya analizados, "
+                           f"{len(pendientes)} nuevos")
+
+        # Cargar los archivos en paralelo (los que no cambiaron salen de la caché)
+        cargados = []
+        def informar_archivo(archivo, resultado):
+            cargados.append(archivo)
+            if isinstance(resultado, Exception):
+                self.advertencia(f"Error al leer {archivo.name}: {resultado}")
+            else:
+                self._informar(f"Cargando ({len(cargados)}/{len(pendientes)}): "
+                               f"{archivo.name} ({len(resultado)} tweets)")
+
+        resultados = cargar_archivos_db(pendientes, COLUMNAS_ANALISIS, self.workers, informar_archivo,
+                                        cache=CacheArchivos(self.tema_path))
+        leidos = [(a, df) for a, df in resultados if not isinstance(df, Exception)]
+        if not leidos and not self.estado_previo.total:
+            raise ErrorAnalisis("No se pudieron cargar datos válidos")
+
+        # Quitar tweets repetidos entre archivos: cada fila se queda solo en el
+        # archivo dueño de su ID. Se registra en orden de archivo para que el
+        # reparto no dependa de qué archivos ya estaban analizados.
+        try:
+            leidos = self._filas_unicas(indice, archivos, desactualizados, dict(leidos))
+        finally:
+            indice.cerrar()
+
+        # Las carpetas .parts siguen creciendo: se analizan pero no entran en el estado guardado
+        self.firmas_nuevas = {a.name: firma_archivo(a) for a, _ in leidos
+                              if a.suffix != EXTENSION_PARCIAL}
+        self.bloques = {}
+        for parcial in (False, True):
+            dfs = [df for a, df in leidos if (a.suffix == EXTENSION_PARCIAL) == parcial]
+            if dfs:
+                datos = pd.concat(dfs, ignore_index=True)
+
+                # Configurar Fecha y Mes
+                datos['Fecha'] = pd.to_datetime(datos['Fecha'])
+                datos['Mes'] = datos['Fecha'].dt.to_period('M')
+                self.bloques[parcial] = datos
+
+    def _cargar_de_base(self):
+        # La base ya guarda cada tweet una vez por tema: solo se lee el rango pedido
+        datos = self.base.cargar(self.carpeta_tema, COLUMNAS_ANALISIS, self.desde, self.hasta)
+        if datos.empty:
+            raise ErrorAnalisis(f"No hay tweets de {self.carpeta_tema} en {self.base.ruta} "
+                                "para el rango indicado")
+        self._informar(f"{len(datos)} tweets leídos de {self.base.ruta}")
+        self.estado_previo = EstadoAgregado()
+        self.firmas_nuevas = {}
+        self.ruta_estado = None
+        datos['Fecha'] = pd.to_datetime(datos['Fecha'])
+        datos['Mes'] = datos['Fecha'].dt.to_period('M')
+        self.bloques = {False: datos}
+
+    def _filas_unicas(self, indice, archivos, desactualizados, leidos):
+        if desactualizados:
+            pendientes_ids = [a for a in desactualizados if a not in leidos]
+            solo_ids = dict(cargar_archivos_db(pendientes_ids, ['ID'], self.workers))
+            for archivo in desactualizados:
+                datos = leidos.get(archivo, solo_ids.get(archivo))
+                if datos is None or isinstance(datos, Exception):
+                    continue
+                indice.registrar(archivo, pd.to_numeric(datos['ID'], errors='coerce').dropna(),
+                                 actualizado=True)
+
+        unicos = []
+        repetidos = 0
+        for archivo in archivos:
+            if archivo not in leidos:
+                continue
+            datos = leidos[archivo]
+            propias = indice.filas_propias(archivo, datos['ID'])
+            if not propias.all():
+                repetidos += len(datos) - propias.sum()
+                datos = datos[propias].reset_index(drop=True)
+            unicos.append((archivo, datos))
+        if repetidos:
+            self._informar(f"{repetidos} tweets repetidos en otros archivos descartados")
+        return unicos
+
+    def _etapa_sentimiento(self):
+        if self.puntuador is None:
+            # Sin interfaz no hay preparación previa: se comprueba aquí (sin red si ya están)
+            asegurar(RECURSOS_ANALISIS)
+            self.puntuador = PuntuadorSentimiento(SentimentIntensityAnalyzer())
+        if not self.bloques:
+            self._informar("Sin tweets nuevos que puntuar")
+            return
+
+        # Análisis de sentimientos (una sola vez por texto distinto, en todos los bloques a la vez)
+        textos = pd.concat([datos['Texto'] for datos in self.bloques.values()], ignore_index=True)
+        puntuaciones = self.puntuador.puntuar(textos).to_numpy()
+        inicio = 0
+        for datos in self.bloques.values():
+            datos['Sentimiento'] = puntuaciones[inicio:inicio + len(datos)]
+            datos['Categoria_Sentimiento'] = datos['Sentimiento'].map(categoria_sentimiento)
+            inicio += len(datos)
+        self._informar(f"{self.puntuador.puntuados} textos distintos puntuados, "
+                       f"{self.puntuador.tasa_aciertos:.0%} reutilizados")
+
+    def _etapa_agregados(self):
+        # Agregados de las filas nuevas (tokenizadas una sola vez), combinados con los guardados
+        parciales = {}
+        for parcial, datos in self.bloques.items():
+            corpus = CorpusTokenizado(datos['Texto'])
+            parciales[parcial] = EstadoAgregado.desde_datos(
+                datos, corpus, self.puntuador.tabla_polaridad, excluir_nube=STOPWORDS_ES | JERGA_INTERNET)
+
+        estado = self.estado_previo
+        if False in parciales:
+            estado = estado.combinar(parciales[False])
+        estado.archivos.update(self.firmas_nuevas)
+        if self.ruta_estado is not None:
+            estado.guardar(self.ruta_estado)
+        if True in parciales:
+            estado = estado.combinar(parciales[True])
+        self.estado = estado
+
+        self.tendencia_mensual = estado.tendencia_mensual()
+        self.sentimientos = estado.valores_sentimiento()
+        self.sentimiento_counts = estado.conteo_categorias()
+
+        # Palabras positivas y negativas
+        self.top_positivas = mas_comunes(estado.palabras_positivas, 10)
+        self.top_negativas = mas_comunes(estado.palabras_negativas, 10)
+
+        # Tendencia dominante
+        self.mayor_sentimiento = self.sentimiento_counts.idxmax()
+        self.porcentaje_mayor = self.sentimiento_counts.max() / self.sentimiento_counts.sum() * 100
+
+        self.top_hashtags = mas_comunes(estado.hashtags, 20)
+        self.top_usuarios = mas_comunes(estado.menciones, 10)
+
+        # Tweets con mayor engagement
+        self.top_tweets = estado.top_tweets
+
+    def _etapa_graficos(self):
+        carpeta_tema = self.carpeta_tema
+        sentimientos = pd.DataFrame({'Sentimiento': self.sentimientos})
+        sentimientos['Categoria_Sentimiento'] = sentimientos['Sentimiento'].map(categoria_sentimiento)
+
+        # Los gráficos son independientes entre sí: se generan en paralelo
+        graficos = [
+            ("📈 Tendencia Mensual", f'tendencia_mensual_{carpeta_tema}.png',
+             Graficos.grafico_tendencia, (self.tendencia_mensual,)),
+            ("📊 Histograma Sentimientos", f'sentimientos_{carpeta_tema}.png',
+             Graficos.grafico_histograma, (self.sentimientos,)),
+            ("📊 Pastel Sentimientos", f"comportamiento_pastel_{carpeta_tema}.png",
+             Graficos.grafico_pastel, (self.sentimiento_counts,)),
+            ("📦 Caja y Bigotes", f"boxplot_sentimientos_{carpeta_tema}.png",
+             Graficos.grafico_boxplot, (sentimientos,)),
+            ("☁️ Nube de Palabras", f"nube_palabras_{carpeta_tema}.png",
+             Graficos.grafico_nube, (dict(mas_comunes(self.estado.palabras_nube)),)),
+        ]
+
+        tareas = [(funcion, self._ruta(archivo), (carpeta_tema, *argumentos))
+                  for _, archivo, funcion, argumentos in graficos]
+        Graficos.renderizar(tareas, self.workers)
+
+        for (nombre, _, _, _), (_, ruta, _) in zip(graficos, tareas):
+            self.generated_files.append((nombre, ruta))
+
+    def _etapa_reporte(self):
+        estado = self.estado
+        carpeta_tema = self.carpeta_tema
+
+        reporte_path = self._ruta(f"reporte_{carpeta_tema}.txt")
+        with open(reporte_path, 'w', encoding='utf-8') as f:
+            f.write(f"REPORTE COMPLETO: {carpeta_tema.upper()}\n")
+            f.write("="*50 + "\n\n")
+            f.write(f"Rango temporal: {estado.fecha_min} a {estado.fecha_max}\n")
+            f.write(f"Tweets analizados: {estado.total}\n\n")
+
+            # Estadísticas de sentimientos
+            sentimientos = self.sentimiento_counts / self.sentimiento_counts.sum() * 100
+            f.write("SENTIMIENTOS:\n")
+            for cat, pct in sentimientos.items():
+                f.write(f"  {cat}: {pct:.1f}%\n")
+
+            f.write("\nPALABRAS POSITIVAS RELEVANTES:\n")
+            for palabra, conteo in self.top_positivas:
+                f.write(f"  {palabra}: {conteo}\n")
+
+            f.write("\nPALABRAS NEGATIVAS RELEVANTES:\n")
+            for palabra, conteo in self.top_negativas:
+                f.write(f"  {palabra}: {conteo}\n")
+
+            f.write("\nTENDENCIA DOMINANTE:\n")
+            if self.porcentaje_mayor >= 60:
+                f.write(f"  Existe una tendencia marcada hacia el sentimiento **{self.mayor_sentimiento.upper()}** ({self.porcentaje_mayor:.1f}%)\n")
+            else:
+                f.write("  No se detecta una tendencia clara dominante en los sentimientos expresados.\n")
+
+            # Hashtags más usados
+            f.write("\nTOP HASHTAGS:\n")
+            for ht, cnt in self.top_hashtags[:10]:
+                f.write(f"  #{ht}: {cnt}\n")
+
+            f.write("\nTWEETS DESTACADOS:\n")
+            for _, row in self.top_tweets.iterrows():
+                f.write(f"\n📅 {row['Fecha']} | 👤 @{row['Usuario']}\n")
+                f.write(f"❤️ {row['Likes']} | 🔄 {row['Retweets']} | 💬 {row['Respuestas']}\n")
+                f.write(f"📝 {row['Texto']}\n")
+
+        self.generated_files.append(("📄 Reporte Completo", reporte_path))
+
+    def _etapa_base_conocimiento(self):
+        sentimientos = pd.Series(self.sentimientos)
+        conocimiento_path = self._ruta(f"base_conocimiento_{self.carpeta_tema}{BaseConocimiento.EXTENSION}")
+
+        # Hashtags filtrados
+        top_hashtags = [ht for ht in self.top_hashtags if not any(c.isdigit() for c in ht[0])]
+
+        base_conocimiento = {
+            'tema': self.carpeta_tema,
+            'hashtags': top_hashtags,
+            'usuarios_mencionados': self.top_usuarios,
+            'tendencia_sentimiento': self.mayor_sentimiento,
+            'porcentaje_dominante': self.porcentaje_mayor,
+            'palabras_positivas': self.top_positivas,
+            'palabras_negativas': self.top_negativas,
+            'metricas_estadisticas': {
+                'media_sentimiento': sentimientos.mean(),
+                'mediana_sentimiento': sentimientos.median(),
+                'desviacion_estandar': sentimientos.std(),
+                'rango_intercuartil': sentimientos.quantile(0.75) - sentimientos.quantile(0.25)
+            },
+            'tweets_destacados': [
+                {
+                    'fecha': str(row['Fecha']),
+                    'usuario': row['Usuario'],
+                    'texto': row['Texto'],
+                    'likes': row['Likes'],
+                    'retweets': row['Retweets'],
+                    'respuestas': row['Respuestas'],
+                    'engagement': row['Engagement']
+                }
+                for _, row in self.top_tweets.iterrows()
+            ]
+        }
+
+        # Cabecera pequeña con el resumen; los tweets destacados en una sección aparte
+        BaseConocimiento.guardar(conocimiento_path, base_conocimiento)
+        self.generated_files.append(("💾 Base de Conocimiento", conocimiento_path))
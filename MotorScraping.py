@@ -0,0 +1,435 @@
+import asyncio
+import json
+import threading
+import time
+from collections import deque
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+
+from twscrape import API, NoAccountError
+
+# Configuración del scraper: cuentas de twscrape y reparto de la búsqueda.
+# Ver config_scraper.example.json; config_scraper.json no se sube al repositorio.
+ARCHIVO_CONFIG = "config_scraper.json"
+
+CONFIG_POR_DEFECTO = {
+    "cuentas": [],         # Las credenciales solo se leen de config_scraper.json
+    "ventana": "mes",      # "mes" o "semana"
+    "concurrencia": 4,     # Ventanas buscadas a la vez como máximo
+    "almacenamiento": "parquet",  # "parquet" (archivos DB_*) o "sqlite" (DB/tweets.sqlite)
+    "archivo_cuentas": "accounts.db",  # Base de twscrape con las cuentas y sus cookies de sesión
+    "peticiones_por_cuenta": 50,  # Búsquedas que admite la API por cuenta en cada periodo de límite
+    "minutos_limite": 15,         # Duración de ese periodo
+    "busqueda_simulada": None     # {} o parámetros de BusquedaSimulada.APISimulada para trabajar sin conexión
+}
+
+# Cola de twscrape que usan las búsquedas (los límites de la API son por cola)
+COLA_BUSQUEDA = "SearchTimeline"
+# Reintentos de una ventana tras errores de red antes de dar el scraping por fallido
+MAX_REINTENTOS = 3
+
+
+def cargar_config(ruta=ARCHIVO_CONFIG):
+    """Lee la configuración del scraper, completando con los valores por defecto"""
+    config = dict(CONFIG_POR_DEFECTO)
+    ruta = Path(ruta)
+    if not ruta.exists():
+        raise ValueError(f"No existe {ruta}: copie config_scraper.example.json como {ruta.name} "
+                         "y complete las cuentas de twscrape")
+    with open(ruta, encoding="utf-8") as f:
+        config.update(json.load(f))
+    if not config["cuentas"] and config["busqueda_simulada"] is None:
+        raise ValueError(f"No hay cuentas configuradas en {ruta} (ver config_scraper.example.json)")
+    return config
+
+
+def ventanas_de_fechas(año, tamaño="mes"):
+    """Divide un año en ventanas [desde, hasta) de un mes o una semana"""
+    inicio = date(int(año), 1, 1)
+    fin = date(int(año) + 1, 1, 1)
+    ventanas = []
+    desde = inicio
+    while desde < fin:
+        if tamaño == "semana":
+            hasta = desde + timedelta(days=7)
+        elif tamaño == "mes":
+            hasta = date(desde.year + desde.month // 12, desde.month % 12 + 1, 1)
+        else:
+            raise ValueError(f"Tamaño de ventana no válido: {tamaño}")
+        hasta = min(hasta, fin)
+        ventanas.append((desde, hasta))
+        desde = hasta
+    return ventanas
+
+
+def construir_consulta(tema, idioma, desde, hasta, max_id=None):
+    """Consulta de una ventana; con max_id solo trae tweets más antiguos que ese ID"""
+    consulta = f"{tema} lang:{idioma} since:{desde.isoformat()} until:{hasta.isoformat()}"
+    if max_id is not None:
+        consulta += f" max_id:{max_id}"
+    return consulta
+
+
+def fila_tweet(tweet, idioma, tema, año):
+    """Convierte un tweet de twscrape en una fila de DB_*"""
+    return {
+        "ID": tweet.id,
+        "Fecha": tweet.date.strftime("%Y-%m-%d %H:%M:%S"),
+        "Usuario": tweet.user.username,
+        "Texto": tweet.rawContent.replace("\n", " "),
+        "Likes": tweet.likeCount,
+        "Retweets": tweet.retweetCount,
+        "Respuestas": tweet.replyCount,
+        "Idioma": idioma,
+        "Tema": tema,
+        "Año": año
+    }
+
+
+class PuntoControl:
+    """Progreso de un scraping, guardado junto a su salida como DB_{n}_....checkpoint.json
+
+    Por cada ventana de fechas se anota si ya terminó, cuántos tweets suyos
+    hay en disco y el más antiguo (ID y fecha). Solo se actualiza con lo que
+    EscritorPorLotes ya escribió, así que al reanudar cada ventana pendiente
+    sigue desde su tweet más antiguo guardado sin perder ni repetir nada.
+    """
+
+    EXTENSION = ".checkpoint.json"
+
+    def __init__(self, ruta, parametros, ventanas):
+        self.ruta = Path(ruta)
+        self.parametros = parametros  # tema, idioma, año, ventana y archivo de salida
+        self.ventanas = ventanas      # desde (ISO) -> estado de la ventana
+        self._lock = threading.Lock()
+
+    @classmethod
+    def crear(cls, archivo_db, tema, idioma, año, tamaño_ventana):
+        archivo_db = Path(archivo_db)
+        parametros = {"tema": tema, "idioma": idioma, "año": str(año),
+                      "ventana": tamaño_ventana, "archivo": archivo_db.name}
+        ventanas = {
+            desde.isoformat(): {"hasta": hasta.isoformat(), "completa": False,
+                                "tweets": 0, "min_id": None, "fecha_mas_antigua": None}
+            for desde, hasta in ventanas_de_fechas(año, tamaño_ventana)
+        }
+        punto = cls(archivo_db.with_name(archivo_db.stem + cls.EXTENSION), parametros, ventanas)
+        punto.guardar()
+        return punto
+
+    @classmethod
+    def cargar(cls, ruta):
+        with open(ruta, encoding="utf-8") as f:
+            datos = json.load(f)
+        return cls(ruta, datos["parametros"], datos["ventanas"])
+
+    @classmethod
+    def buscar(cls, carpeta, tema, idioma, año):
+        """Punto de control pendiente en `carpeta` para esos parámetros, o None"""
+        for ruta in sorted(Path(carpeta).glob(f"DB_*{cls.EXTENSION}"), reverse=True):
+            try:
+                punto = cls.cargar(ruta)
+            except (OSError, ValueError, KeyError):
+                continue
+            p = punto.parametros
+            if (p["tema"], p["idioma"], p["año"]) == (tema, idioma, str(año)):
+                return punto
+        return None
+
+    @property
+    def archivo(self):
+        return self.ruta.with_name(self.parametros["archivo"])
+
+    @property
+    def total(self):
+        return sum(v["tweets"] for v in self.ventanas.values())
+
+    def pendientes(self):
+        """(desde, hasta, max_id) de las ventanas que faltan por terminar"""
+        return [(date.fromisoformat(desde), date.fromisoformat(v["hasta"]),
+                 v["min_id"] - 1 if v["min_id"] is not None else None)
+                for desde, v in self.ventanas.items() if not v["completa"]]
+
+    def registrar_filas(self, filas):
+        """Anota tweets ya escritos en disco (se llama desde el hilo de escritura)"""
+        with self._lock:
+            for fila in filas:
+                dia = fila["Fecha"][:10]
+                for desde, v in self.ventanas.items():
+                    if desde <= dia < v["hasta"]:
+                        v["tweets"] += 1
+                        if v["min_id"] is None or fila["ID"] < v["min_id"]:
+                            v["min_id"] = fila["ID"]
+                            v["fecha_mas_antigua"] = fila["Fecha"]
+                        break
+            self._guardar()
+
+    def completar(self, desde):
+        with self._lock:
+            self.ventanas[desde.isoformat()]["completa"] = True
+            self._guardar()
+
+    def guardar(self):
+        with self._lock:
+            self._guardar()
+
+    def _guardar(self):
+        temporal = self.ruta.with_name(f".{self.ruta.name}")
+        with open(temporal, "w", encoding="utf-8") as f:
+            json.dump({"parametros": self.parametros, "ventanas": self.ventanas},
+                      f, ensure_ascii=False, indent=2)
+        temporal.replace(self.ruta)
+
+    def eliminar(self):
+        self.ruta.unlink(missing_ok=True)
+
+
+class SesionTwitter:
+    """API de twscrape que se mantiene durante toda la sesión de la aplicación
+
+    Las cuentas y sus cookies viven en la base de twscrape (`archivo_cuentas`),
+    así que entre ejecuciones se reutiliza la sesión guardada. Las cuentas del
+    config se añaden una sola vez (las que ya están en la base no cambian) y
+    solo se vuelve a iniciar sesión en las que twscrape marcó como inactivas:
+    nuevas o con la sesión caducada.
+    """
+
+    def __init__(self, config):
+        self.cuentas = config["cuentas"]
+        if config["busqueda_simulada"] is not None:
+            from BusquedaSimulada import APISimulada
+            self.api = APISimulada(**config["busqueda_simulada"])
+            self._cuentas_añadidas = True
+            return
+        # Sin cuentas libres twscrape lanza NoAccountError en lugar de esperar
+        # en silencio: la espera la decide PlanificadorCuotas
+        self.api = API(config["archivo_cuentas"], raise_when_no_account=True)
+        self._cuentas_añadidas = False
+
+    async def preparar(self):
+        """Deja el pool listo para buscar; devuelve el número de cuentas activas"""
+        if not self._cuentas_añadidas:
+            for cuenta in self.cuentas:
+                await self.api.pool.add_account(**cuenta)
+            self._cuentas_añadidas = True
+
+        cuentas = await self.api.pool.accounts_info()
+        if any(not cuenta["active"] for cuenta in cuentas):
+            # login_all solo intenta las inactivas que no fallaron antes
+            await self.api.pool.login_all()
+            cuentas = await self.api.pool.accounts_info()
+        return sum(1 for cuenta in cuentas if cuenta["active"])
+
+
+class PlanificadorCuotas:
+    """Reparte las búsquedas según la cuota de la API que le queda a cada cuenta
+
+    Lee del pool de twscrape el estado de cada cuenta: si está activa, hasta
+    cuándo está bloqueada para la cola de búsqueda (en uso o por límite, con
+    la hora exacta de reinicio) y cuántas peticiones lleva. Con eso estima
+    las peticiones que le quedan en el periodo actual y solo da turno a una
+    ventana de fechas cuando hay una cuenta libre con cuota. Si no la hay,
+    espera hasta el próximo reinicio y lo avisa con `al_esperar(segundos)`.
+    Cuando twscrape se queda sin cuentas aunque la estimación decía que no,
+    la espera crece (backoff) hasta que una búsqueda vuelve a ir bien.
+    """
+
+    ESPERA_MINIMA = 5
+    ESPERA_MAXIMA = 300
+
+    def __init__(self, pool, peticiones_por_cuenta=50, minutos_limite=15, al_esperar=None,
+                 cola=COLA_BUSQUEDA):
+        self.pool = pool
+        self.cola = cola
+        self.peticiones_por_cuenta = peticiones_por_cuenta
+        self.periodo = timedelta(minutes=minutos_limite)
+        self.al_esperar = al_esperar or (lambda segundos: None)
+        self.cuentas = {}  # usuario -> estado (ver actualizar)
+        self._arrancando = 0
+        self._activas = 0  # Búsquedas propias en curso (cada una tiene una cuenta en uso)
+        self._bloqueadas = 0  # Cuentas activas bloqueadas ahora mismo (en uso o por límite)
+        self._penalizacion = 0
+        self._lock = asyncio.Lock()
+        self._inicio = time.monotonic()
+        self.tweets = 0
+
+    async def actualizar(self):
+        ahora = datetime.now(timezone.utc)
+        for cuenta in await self.pool.get_all():
+            estado = self.cuentas.setdefault(cuenta.username, {
+                "peticiones": cuenta.stats.get(self.cola, 0), "usadas": 0, "desde": ahora, "reinicio": None})
+            bloqueo = cuenta.locks.get(self.cola)
+            # Pasado el periodo, o tras un bloqueo por límite ya vencido, la cuota vuelve a estar entera
+            if ahora - estado["desde"] >= self.periodo or (estado["reinicio"] and estado["reinicio"] <= ahora):
+                estado.update(usadas=0, desde=ahora, reinicio=None)
+            nuevas = cuenta.stats.get(self.cola, 0) - estado["peticiones"]
+            estado["peticiones"] += nuevas
+            estado["usadas"] += max(nuevas, 0)
+            estado["activa"] = cuenta.active
+            estado["bloqueo"] = bloqueo if bloqueo and bloqueo > ahora else None
+            if estado["usadas"] >= self.peticiones_por_cuenta and not estado["reinicio"]:
+                estado["reinicio"] = estado["desde"] + self.periodo
+        self._bloqueadas = sum(1 for e in self.cuentas.values() if e["activa"] and e["bloqueo"])
+
+    def restantes(self, usuario):
+        estado = self.cuentas[usuario]
+        if not estado["activa"] or estado["bloqueo"] or estado["reinicio"]:
+            return 0
+        return self.peticiones_por_cuenta - estado["usadas"]
+
+    def libres(self):
+        return [u for u in self.cuentas if self.restantes(u) > 0]
+
+    def espera(self):
+        """Segundos hasta que se libere alguna cuenta, o None si no queda ninguna activa"""
+        ahora = datetime.now(timezone.utc)
+        fines = [max(e["bloqueo"] or ahora, e["reinicio"] or ahora)
+                 for e in self.cuentas.values() if e["activa"]]
+        if not fines:
+            return None
+        return max((min(fines) - ahora).total_seconds(), 0) + self._penalizacion
+
+    async def turno(self):
+        """Espera a que haya una cuenta libre con cuota para empezar una búsqueda"""
+        async with self._lock:
+            while True:
+                await self.actualizar()
+                # Una búsqueda que arranca puede haber bloqueado ya su cuenta antes
+                # de recibir el primer tweet: esa no se descuenta dos veces
+                sin_cuenta = min(self._arrancando, max(self._activas - self._bloqueadas, 0))
+                if len(self.libres()) > sin_cuenta:
+                    self._arrancando += 1
+                    self._activas += 1
+                    return
+                if self._activas >= sum(1 for e in self.cuentas.values() if e["activa"]):
+                    # Todas las cuentas están en nuestras propias búsquedas: no hay límite que esperar
+                    await asyncio.sleep(1)
+                    continue
+                espera = self.espera()
+                if espera is None:
+                    raise NoAccountError("No quedan cuentas activas para buscar")
+                self.al_esperar(espera)
+                # Se duerme en tramos cortos para ir actualizando la espera mostrada
+                await asyncio.sleep(min(max(espera, 1), 30))
+
+    def en_marcha(self):
+        """La búsqueda que recibió turno ya tiene cuenta (twscrape la bloqueó)"""
+        self._arrancando = max(self._arrancando - 1, 0)
+
+    def terminada(self):
+        self._activas = max(self._activas - 1, 0)
+
+    def sin_cuentas(self):
+        # La estimación falló (otra aplicación usa las cuentas, límites distintos...)
+        self._penalizacion = min(max(self._penalizacion * 2, self.ESPERA_MINIMA), self.ESPERA_MAXIMA)
+
+    def exito(self, tweets=1):
+        self._penalizacion = 0
+        self.tweets += tweets
+
+    @property
+    def tweets_por_minuto(self):
+        minutos = (time.monotonic() - self._inicio) / 60
+        return self.tweets / minutos if minutos > 0 else 0.0
+
+
+async def buscar_por_ventanas(api, tema, idioma, año, limite, escritor,
+                              al_recibir=None, tamaño_ventana="mes", concurrencia=4,
+                              punto_control=None, vistos=None, conocidos=None, planificador=None):
+    """Busca un año de tweets repartido en ventanas de fechas concurrentes
+
+    `concurrencia` búsquedas van tomando ventanas de una cola; cada una
+    espera turno en `planificador` (PlanificadorCuotas), así solo se busca
+    cuando hay una cuenta con cuota y las esperas por límite son visibles.
+    Una ventana que se queda sin cuentas o falla por la red vuelve a la
+    cola y se retoma desde su tweet más antiguo. Los resultados se
+    deduplican por ID y se escriben en `escritor` hasta llegar a `limite`.
+    `al_recibir(fila)` se llama por cada tweet nuevo guardado.
+
+    Con `punto_control` solo se buscan sus ventanas pendientes, cada una desde
+    su tweet más antiguo ya guardado, y se marcan como completas al terminar.
+    `vistos` son los IDs que ya están en disco. Los tweets que estén en
+    `conocidos` (el IndiceIds de la carpeta) se descartan al recibirlos.
+    """
+    cola = asyncio.Queue(maxsize=1000)
+    planificador = planificador or PlanificadorCuotas(api.pool)
+
+    if punto_control is not None:
+        ventanas = punto_control.pendientes()
+    else:
+        ventanas = [(desde, hasta, None) for desde, hasta in ventanas_de_fechas(año, tamaño_ventana)]
+    pendientes = deque((desde, hasta, max_id, 0) for desde, hasta, max_id in ventanas)
+
+    async def buscar_ventana(desde, hasta, max_id, intentos):
+        """Busca una ventana; devuelve None si terminó o la ventana a retomar"""
+        await planificador.turno()
+        iniciada = False
+        try:
+            consulta = construir_consulta(tema, idioma, desde, hasta, max_id)
+            async for tweet in api.search(consulta, limit=limite):
+                if not iniciada:
+                    planificador.en_marcha()
+                    iniciada = True
+                planificador.exito()
+                max_id = tweet.id - 1 if max_id is None else min(max_id, tweet.id - 1)
+                await cola.put(fila_tweet(tweet, idioma, tema, año))
+        except NoAccountError:
+            # Agotar la cuota a mitad de ventana es lo normal; sin cuenta para
+            # empezar, la estimación del planificador falló
+            if not iniciada:
+                planificador.sin_cuentas()
+            return (desde, hasta, max_id, intentos)
+        except Exception:
+            if intentos + 1 >= MAX_REINTENTOS:
+                raise
+            await asyncio.sleep(planificador.ESPERA_MINIMA * 2 ** intentos)
+            return (desde, hasta, max_id, intentos + 1)
+        finally:
+            if not iniciada:
+                planificador.en_marcha()
+            planificador.terminada()
+        # Aviso de fin de ventana, detrás de sus tweets en la cola
+        await cola.put(desde)
+        return None
+
+    async def trabajador():
+        while pendientes:
+            ventana = pendientes.popleft()
+            retomar = await buscar_ventana(*ventana)
+            if retomar is not None:
+                # Se retoma antes que las ventanas sin empezar
+                pendientes.appendleft(retomar)
+
+    tareas = [asyncio.create_task(trabajador()) for _ in range(min(concurrencia, len(pendientes)))]
+    todas = asyncio.gather(*tareas, return_exceptions=True)
+    # Cuando terminan todas las ventanas se avisa al consumidor con None
+    todas.add_done_callback(lambda _: asyncio.ensure_future(cola.put(None)))
+
+    vistos = set(vistos or ())
+    try:
+        while escritor.total < limite:
+            fila = await cola.get()
+            if fila is None:
+                break
+            if isinstance(fila, date):
+                if punto_control is not None:
+                    # La ventana solo cuenta como completa con todos sus tweets en disco
+                    escritor.sincronizar()
+                    punto_control.completar(fila)
+                continue
+            if fila["ID"] in vistos or (conocidos is not None and fila["ID"] in conocidos):
+                continue
+            vistos.add(fila["ID"])
+            escritor.agregar(fila)
+            if al_recibir:
+                al_recibir(fila)
+    finally:
+        for tarea in tareas:
+            tarea.cancel()
+        resultados = await todas
+
+    # Lo ya descargado queda en el escritor; se avisa del primer error de búsqueda
+    errores = [r for r in resultados if isinstance(r, Exception)]
+    if errores:
+        raise errores[0]
+    return escritor.total
@@ -0,0 +1,133 @@
+import cProfile
+import json
+import os
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+# Perfil por etapas del análisis: tiempo real, CPU, pico de memoria y filas de
+# cada etapa de PipelineAnalisis, guardado en profile_{tema}.json junto al
+# reporte. Se activa con perfil=True en el pipeline, con --perfil en
+# AnalisisLote.py o con la variable de entorno (también para la interfaz):
+#
+#   PERFIL_ANALISIS=1 python Analisis.py          # solo profile_{tema}.json
+#   PERFIL_ANALISIS=cprofile python Analisis.py   # y profile_{tema}_{etapa}.prof
+#
+# Los .prof se abren con `python -m pstats` o snakeviz.
+VARIABLE_ENTORNO = "PERFIL_ANALISIS"
+MODOS = ('resumen', 'cprofile')
+
+
+def modo_de_entorno():
+    """Modo pedido en PERFIL_ANALISIS: None, 'resumen' o 'cprofile'"""
+    valor = os.environ.get(VARIABLE_ENTORNO, "").strip().lower()
+    if valor in ("", "0", "no", "false"):
+        return None
+    return 'cprofile' if valor == 'cprofile' else 'resumen'
+
+
+def _cpu_hijos():
+    tiempos = os.times()
+    return tiempos.children_user + tiempos.children_system
+
+
+class PerfiladorEtapas:
+    """Mide cada etapa de un análisis y guarda el resultado en JSON
+
+    Uso: `with perfilador.etapa(clave, nombre): ...` por cada etapa, y
+    `filas(n)` dentro para anotar cuántas filas procesó. La CPU propia es la
+    de todo el proceso (incluye hilos); la de los procesos hijo (carga y
+    gráficos en paralelo) se cuenta aparte cuando terminan. La memoria es el
+    pico de tracemalloc, así que solo incluye lo reservado por Python en
+    este proceso. cProfile solo ve el hilo que ejecuta la etapa.
+    """
+
+    def __init__(self, tema, carpeta_salida, modo='resumen'):
+        if modo not in MODOS:
+            raise ValueError(f"Modo de perfil no válido: {modo}")
+        self.tema = tema
+        self.carpeta_salida = Path(carpeta_salida)
+        self.modo = modo
+        self.etapas = []
+        self._filas = None
+        self._propio_tracemalloc = False
+
+    def iniciar(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._propio_tracemalloc = True
+
+    def filas(self, n):
+        self._filas = int(n)
+
+    def etapa(self, clave, nombre):
+        return _MedicionEtapa(self, clave, nombre)
+
+    def ruta(self):
+        return self.carpeta_salida / f"profile_{self.tema}.json"
+
+    def guardar(self):
+        """Escribe profile_{tema}.json y devuelve su ruta"""
+        total = {campo: sum(e[campo] for e in self.etapas) for campo in ('wall', 'cpu', 'cpu_hijos')}
+        total['memoria_pico_mb'] = max((e['memoria_pico_mb'] for e in self.etapas), default=0.0)
+        datos = {
+            "tema": self.tema,
+            "fecha": datetime.now().isoformat(timespec='seconds'),
+            "modo": self.modo,
+            "etapas": self.etapas,
+            "total": total
+        }
+        ruta = self.ruta()
+        ruta.write_text(json.dumps(datos, indent=2, ensure_ascii=False), encoding="utf-8")
+        return ruta
+
+    def terminar(self):
+        if self._propio_tracemalloc:
+            tracemalloc.stop()
+            self._propio_tracemalloc = False
+
+
+class _MedicionEtapa:
+    def __init__(self, perfilador, clave, nombre):
+        self.perfilador = perfilador
+        self.clave = clave
+        self.nombre = nombre
+
+    def __enter__(self):
+        self.perfilador._filas = None
+        self._perfil = cProfile.Profile() if self.perfilador.modo == 'cprofile' else None
+        tracemalloc.reset_peak()
+        self._memoria = tracemalloc.get_traced_memory()[0]
+        self._cpu_hijos = _cpu_hijos()
+        self._cpu = time.process_time()
+        self._inicio = time.perf_counter()
+        if self._perfil is not None:
+            self._perfil.enable()
+        return self
+
+    def __exit__(self, tipo, error, traza):
+        if self._perfil is not None:
+            self._perfil.disable()
+        wall = time.perf_counter() - self._inicio
+        cpu = time.process_time() - self._cpu
+        cpu_hijos = _cpu_hijos() - self._cpu_hijos
+        pico = tracemalloc.get_traced_memory()[1]
+
+        medicion = {
+            "etapa": self.clave,
+            "nombre": self.nombre,
+            "wall": wall,
+            "cpu": cpu,
+            "cpu_hijos": cpu_hijos,
+            # Lo que la etapa llegó a reservar por encima de lo que ya había
+            "memoria_pico_mb": max(pico - self._memoria, 0) / 2 ** 20,
+            "filas": self.perfilador._filas,
+            "completada": tipo is None
+        }
+        if self._perfil is not None:
+            ruta = self.perfilador.carpeta_salida / f"profile_{self.perfilador.tema}_{self.clave}.prof"
+            self._perfil.dump_stats(ruta)
+            medicion["cprofile"] = str(ruta)
+        self.perfilador.etapas.append(medicion)
+        return False
@@ -1,13 +1,15 @@
 import tkinter as tk
 from tkinter import ttk, scrolledtext, messagebox, filedialog
-import pickle
 import random
-import nltk
-from nltk.sentiment import SentimentIntensityAnalyzer
 from difflib import SequenceMatcher
 from collections import defaultdict
 import threading
 from tkinter import font as tkfont
+from RecursosNLTK import EstadoRecursos, RECURSOS_PREDICCIONES
+from BaseConocimiento import BaseConocimiento, EXTENSION, EXTENSION_ANTIGUA
+
+# nltk se importa en el hilo de configurar_nltk (ver CargaDiferida)
+MODULOS_PESADOS = ['nltk', 'nltk.sentiment']
 
 class TrendAnalyzerApp:
     def __init__(self, root):
@@ -19,12 +21,14 @@ class TrendAnalyzerApp:
         # Variables
         self.base_conocimiento = None
         self.loading = False
+        self.analyzer = None
+        self.recursos = EstadoRecursos(RECURSOS_PREDICCIONES)
         
         # Configurar estilo
         self.setup_styles()
         
-        # Configurar NLTK en segundo plano
-        threading.Thread(target=self.configurar_nltk, daemon=True).start()
+        # Importar y configurar NLTK en segundo plano (la ventana no espera al import)
+        self.recursos.iniciar(self.configurar_nltk)
         
         # Crear interfaz
         self.create_widgets()
@@ -62,22 +66,18 @@ class TrendAnalyzerApp:
             'footer_fg': '#95a5a6'
         }
     
-    def configurar_nltk(self):
-        try:
-            nltk.download('vader_lexicon', quiet=True)
-            nltk.download('punkt', quiet=True)
-            nltk.download('stopwords', quiet=True)
-            
+    def configurar_nltk(self, error):
+        # Llamado desde el hilo de EstadoRecursos con los recursos ya comprobados
+        if error is None:
             try:
-                nltk.data.find('tokenizers/punkt/spanish.pickle')
-            except LookupError:
-                nltk.download('punkt', quiet=True)
-                nltk.download('cess_esp', quiet=True)
-            
-            nltk.download('stopwords', quiet=True)
-            self.analyzer = SentimentIntensityAnalyzer()
-        except Exception as e:
-            messagebox.showerror("Error", f"Error configurando NLTK: {str(e)}")
+                from nltk.sentiment import SentimentIntensityAnalyzer
+                self.analyzer = SentimentIntensityAnalyzer()
+            except Exception as e:
+                error = e
+        if error is not None:
+            self.recursos.error = error
+            mensaje = f"Error configurando NLTK: {error}"
+            self.root.after(0, lambda: messagebox.showerror("Error", mensaje))
     
     def create_widgets(self):
         # Frame principal
@@ -295,7 +295,10 @@ class TrendAnalyzerApp:
         return button
     
     def browse_file(self):
-        filename = filedialog.askopenfilename(filetypes=[("Archivos PKL", "*.pkl")])
+        filename = filedialog.askopenfilename(filetypes=[
+            ("Base de conocimiento", f"*{EXTENSION} *{EXTENSION_ANTIGUA}"),
+            ("Formato actual", f"*{EXTENSION}"),
+            ("Formato antiguo (PKL)", f"*{EXTENSION_ANTIGUA}")])
         if filename:
             self.file_entry.delete(0, tk.END)
             self.file_entry.insert(0, filename)
@@ -306,12 +309,25 @@ class TrendAnalyzerApp:
             messagebox.showerror("Error", "Por favor selecciona un archivo")
             return
         
+        # pickle puede ejecutar código al leerse: los .pkl solo si son de confianza
+        if filename.endswith(EXTENSION_ANTIGUA) and not messagebox.askyesno(
+            "Formato antiguo",
+            "Los archivos .pkl pueden ejecutar código al abrirse. Ábralo solo si es de confianza "
+            "(python BaseConocimiento.py lo convierte al formato actual).\n\n¿Abrirlo igualmente?",
+            icon="warning",
+            default="no"
+        ):
+            return
+        
         self.set_status("Cargando base de conocimiento...")
         self.gen_ideas_btn.config(state=tk.DISABLED)
         
         try:
-            with open(filename, 'rb') as f:
-                self.base_conocimiento = pickle.load(f)
+            # Solo se lee la cabecera; los tweets destacados se leerían al pedirlos
+            base = BaseConocimiento.abrir(filename)
+            if self.base_conocimiento is not None:
+                self.base_conocimiento.cerrar()
+            self.base_conocimiento = base
             
             self.topic_label.config(text=f"Tema: {self.base_conocimiento['tema'].upper()}")
             
@@ -437,8 +453,17 @@ class TrendAnalyzerApp:
             messagebox.showerror("Error", "Primero carga una base de conocimiento")
             return
         
+        # Puntuar requiere los recursos NLTK y el analizador ya preparados
+        if self.recursos.error is not None:
+            messagebox.showerror("Error", f"Recursos NLTK no disponibles: {self.recursos.error}")
+            return
+        if self.analyzer is None:
+            messagebox.showinfo("Preparando", "Los recursos NLTK aún se están preparando; inténtelo en unos segundos")
+            return
+        
         self.set_status(f"Analizando idea: {idea[:30]}...")
         
+        import nltk
         try:
             idea_lower = idea.lower()
             
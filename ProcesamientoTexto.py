@@ -0,0 +1,160 @@
+import re
+from array import array
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+# Las URLs (t.co/...) no aportan sentimiento y cambian entre retweets y copias
+PATRON_URL = re.compile(r"https?://\S+|www\.\S+")
+PATRON_ESPACIOS = re.compile(r"\s+")
+
+# Reglas de limpieza de palabras comunes a la nube, las palabras clave y los conteos
+CARACTERES_PUNTUACION = ".,!?\"':;()[]{}"
+PREFIJOS_EXCLUIDOS = ('http', '@', '#')
+
+
+def normalizar_texto(texto):
+    """Quita URLs y espacios repetidos para que las copias de un tweet coincidan"""
+    texto = PATRON_URL.sub(" ", str(texto))
+    return PATRON_ESPACIOS.sub(" ", texto).strip()
+
+
+class PuntuadorSentimiento:
+    """Calcula el sentimiento VADER una sola vez por cada texto distinto
+
+    Los textos se normalizan antes de puntuarse y el resultado se reparte a
+    todas las filas con el mismo texto. Las puntuaciones se recuerdan entre
+    análisis hasta `max_memo` textos distintos.
+    """
+
+    def __init__(self, analyzer, max_memo=500_000):
+        self.analyzer = analyzer
+        self.max_memo = max_memo
+        self.memo = {}
+        self.filas = 0
+        self.puntuados = 0
+        self._tabla_polaridad = None
+
+    def puntuar(self, textos):
+        """Devuelve una Serie con el 'compound' de cada texto, alineada con `textos`"""
+        claves = textos.map(normalizar_texto)
+        unicos = pd.unique(claves)
+
+        nuevos = [t for t in unicos if t not in self.memo]
+        if len(self.memo) + len(nuevos) > self.max_memo:
+            self.memo.clear()
+            nuevos = list(unicos)
+        for texto in nuevos:
+            self.memo[texto] = self.analyzer.polarity_scores(texto)['compound']
+
+        self.filas = len(claves)
+        self.puntuados = len(nuevos)
+        return claves.map(self.memo).astype(float)
+
+    @property
+    def tabla_polaridad(self):
+        """Tabla de polaridad por palabra del léxico, calculada la primera vez que se pide"""
+        if self._tabla_polaridad is None:
+            self._tabla_polaridad = construir_tabla_polaridad(self.analyzer)
+        return self._tabla_polaridad
+
+    @property
+    def tasa_aciertos(self):
+        """Fracción de filas de la última llamada que no necesitaron puntuarse"""
+        if not self.filas:
+            return 0.0
+        return 1 - self.puntuados / self.filas
+
+
+def construir_tabla_polaridad(analyzer, umbral=0.1):
+    """Precalcula el 'compound' de cada palabra del léxico VADER que lo supera
+
+    Una palabra suelta que no está en el léxico siempre puntúa 0, así que
+    basta con evaluar las del léxico una vez. Devuelve {palabra: compound}
+    solo con las palabras que pasan el umbral positivo o negativo.
+    """
+    tabla = {}
+    for palabra in analyzer.lexicon:
+        if len(palabra) > 3 and palabra.isalpha():
+            compound = analyzer.polarity_scores(palabra)['compound']
+            if compound > umbral or compound < -umbral:
+                tabla[palabra] = compound
+    return tabla
+
+
+def es_palabra_valida(palabra):
+    """Palabra ya limpia con contenido: más de 3 letras y sin URL, mención o hashtag"""
+    return (len(palabra) > 3 and
+            not palabra.startswith(PREFIJOS_EXCLUIDOS) and
+            palabra.isalpha())
+
+
+class CorpusTokenizado:
+    """Tokenización única de los tweets, compartida por todas las etapas del análisis
+
+    Recorre los textos una sola vez y guarda:
+      - `vocabulario`: lista de palabras válidas distintas (id -> palabra)
+      - `ids`: array con el id de cada palabra válida, en orden de aparición
+      - `limites`: posición en `ids` donde empieza cada tweet (n_tweets + 1)
+      - `hashtags` y `menciones`: Counters de los tokens con '#' y '@'
+    """
+
+    def __init__(self, textos):
+        indices = {}
+        ids = array('i')
+        limites = array('q', [0])
+        hashtags = Counter()
+        menciones = Counter()
+        # Resultado de limpiar cada token crudo distinto (-1 si no es palabra válida)
+        tokens_vistos = {}
+
+        for texto in textos:
+            for token in str(texto).split():
+                if token.startswith('#'):
+                    hashtags[token.lower()] += 1
+                elif token.startswith('@'):
+                    menciones[token.lower()] += 1
+
+                id_palabra = tokens_vistos.get(token)
+                if id_palabra is None:
+                    palabra = token.strip(CARACTERES_PUNTUACION).lower()
+                    if es_palabra_valida(palabra):
+                        id_palabra = indices.setdefault(palabra, len(indices))
+                    else:
+                        id_palabra = -1
+                    tokens_vistos[token] = id_palabra
+                if id_palabra >= 0:
+                    ids.append(id_palabra)
+            limites.append(len(ids))
+
+        self.vocabulario = list(indices)
+        self.ids = np.frombuffer(ids, dtype=np.int32) if ids else np.zeros(0, dtype=np.int32)
+        self.limites = np.frombuffer(limites, dtype=np.int64)
+        self.hashtags = hashtags
+        self.menciones = menciones
+
+    def ids_de_filas(self, filas=None):
+        """Ids de las palabras de los tweets seleccionados por la máscara booleana `filas`"""
+        if filas is None:
+            return self.ids
+        longitudes = np.diff(self.limites)
+        return self.ids[np.repeat(np.asarray(filas, dtype=bool), longitudes)]
+
+    def palabras(self, filas=None, excluir=()):
+        """Lista de palabras en orden de aparición, sin las incluidas en `excluir`"""
+        vocabulario = self.vocabulario
+        ids = self.ids_de_filas(filas)
+        if excluir:
+            permitidas = np.array([p not in excluir for p in vocabulario], dtype=bool)
+            ids = ids[permitidas[ids]]
+        return [vocabulario[i] for i in ids]
+
+    def clasificar(self, tabla, umbral=0.1):
+        """Separa las palabras en positivas y negativas según la tabla de polaridad"""
+        vocabulario = self.vocabulario
+        polaridad = np.array([tabla.get(p, 0.0) for p in vocabulario], dtype=float)
+        valores = polaridad[self.ids]
+        positivas = [vocabulario[i] for i in self.ids[valores > umbral]]
+        negativas = [vocabulario[i] for i in self.ids[valores < -umbral]]
+        return positivas, negativas
@@ -0,0 +1,61 @@
+import threading
+
+# Progreso de tareas largas (scraping, análisis) hacia la interfaz.
+# Los hilos de trabajo solo sobrescriben el último estado, sin tocar Tk; la
+# interfaz lo consulta a ritmo fijo y aplica únicamente el más reciente, así
+# miles de actualizaciones por segundo se convierten en unas pocas por cuadro.
+CUADROS_POR_SEGUNDO = 20
+
+
+class CanalProgreso:
+    """Último estado de progreso publicado por un hilo de trabajo
+
+    publicar(**campos) es seguro desde cualquier hilo y casi gratuito: solo
+    actualiza un diccionario. vigilar(root, aplicar) consulta el canal desde
+    el hilo de Tk y llama a aplicar(estado) cuando hubo cambios; el estado
+    acumula los campos publicados, así que siempre está completo.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._estado = {}
+        self._version = 0
+        self._aplicada = 0
+        self._activo = False
+        self._ronda = 0
+
+    def publicar(self, **campos):
+        with self._lock:
+            self._estado.update(campos)
+            self._version += 1
+
+    def leer(self):
+        """Estado actual si cambió desde la última lectura, o None"""
+        with self._lock:
+            if self._version == self._aplicada:
+                return None
+            self._aplicada = self._version
+            return dict(self._estado)
+
+    def vigilar(self, root, aplicar, cuadros_por_segundo=CUADROS_POR_SEGUNDO):
+        """Empieza a consultar el canal desde Tk hasta que se llame a detener()"""
+        intervalo = max(1, 1000 // cuadros_por_segundo)
+        self._activo = True
+        self._ronda += 1
+        ronda = self._ronda
+
+        def sondear():
+            if ronda != self._ronda or not root.winfo_exists():
+                return  # Otra llamada a vigilar() tomó el relevo, o la ventana se cerró
+            activo = self._activo
+            estado = self.leer()
+            if estado is not None:
+                aplicar(estado)
+            # Tras detener() se hace una última lectura para no perder el estado final
+            if activo:
+                root.after(intervalo, sondear)
+
+        root.after(0, sondear)
+
+    def detener(self):
+        self._activo = False
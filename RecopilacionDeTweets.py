@@ -1,12 +1,76 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog, font as tkfont 
 import asyncio
-from twscrape import API
-import pandas as pd
+import atexit
 from pathlib import Path
-from datetime import datetime
+from ProgresoUI import CanalProgreso
+from CargaDiferida import precargar
+from datetime import datetime, timedelta
 import threading
 
+# twscrape, pandas y pyarrow se importan al usarlos (ver CargaDiferida);
+# estos módulos se precargan en segundo plano en cuanto se pinta la ventana
+MODULOS_PESADOS = ['pandas', 'Almacenamiento', 'BaseDatosSQLite', 'MotorScraping']
+
+# Un único bucle asyncio y una única sesión de twscrape por proceso: todas las
+# ventanas del scraper (también las que abre el menú) los comparten, así la
+# sesión sigue abierta aunque la ventana se cierre tras un scraping. Al salir
+# del proceso cerrar_bucle() deja terminar la limpieza de lo que esté en curso.
+_bucle = None
+_hilo_bucle = None
+_sesion = None
+_lock_bucle = threading.Lock()
+
+
+def bucle_scraping():
+    """Bucle asyncio compartido, en su propio hilo; se crea la primera vez"""
+    global _bucle, _hilo_bucle
+    with _lock_bucle:
+        if _bucle is None:
+            _bucle = asyncio.new_event_loop()
+            _hilo_bucle = threading.Thread(target=_bucle.run_forever, daemon=True)
+            _hilo_bucle.start()
+    return _bucle
+
+
+async def _cancelar_tareas():
+    tareas = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+    for tarea in tareas:
+        tarea.cancel()
+    # Cada scraping cancelado guarda su último lote y cierra el índice en su finally
+    await asyncio.gather(*tareas, return_exceptions=True)
+    bucle = asyncio.get_running_loop()
+    await bucle.shutdown_asyncgens()
+    await bucle.shutdown_default_executor()
+
+
+@atexit.register
+def cerrar_bucle(timeout=60):
+    """Cancela los scrapings en curso, espera a que terminen de limpiar y cierra el bucle"""
+    global _bucle, _hilo_bucle, _sesion
+    with _lock_bucle:
+        bucle, hilo = _bucle, _hilo_bucle
+        _bucle = _hilo_bucle = _sesion = None
+    if bucle is None:
+        return
+    try:
+        asyncio.run_coroutine_threadsafe(_cancelar_tareas(), bucle).result(timeout)
+    finally:
+        bucle.call_soon_threadsafe(bucle.stop)
+        hilo.join(timeout)
+        if not bucle.is_running():
+            bucle.close()
+
+
+def sesion_twitter(config):
+    """Sesión de twscrape compartida; solo se usa desde el bucle de bucle_scraping()"""
+    global _sesion
+    if _sesion is None:
+        from MotorScraping import SesionTwitter
+        _sesion = SesionTwitter(config)
+    return _sesion
+
+
 class TwitterScraperApp:
     def __init__(self, root):
         self.root = root
@@ -22,6 +86,15 @@ class TwitterScraperApp:
         self.subcarpeta_var = tk.StringVar()
         self.status_var = tk.StringVar(value="Esperando configuración...")
         
+        # Progreso publicado por el hilo de scraping, aplicado a ritmo fijo
+        self.canal = CanalProgreso()
+        
+        # Bucle asyncio compartido por todas las ventanas del scraper
+        self.loop = bucle_scraping()
+        self.futuro = None  # Scraping en curso de esta ventana
+        # Abierta desde el menú la ventana es un Toplevel: al cerrarla se cancela su scraping
+        self.root.bind("<Destroy>", self.al_cerrar, add="+")
+        
         # Configuración de estilo
         self.setup_style()
         
@@ -43,6 +116,8 @@ class TwitterScraperApp:
         
         # Footer
         self.create_footer()
+        
+        precargar(self.root, MODULOS_PESADOS)
     
     def setup_style(self):
         style = ttk.Style()
@@ -333,128 +408,214 @@ class TwitterScraperApp:
         return True
     
     def start_scraping(self):
+        from MotorScraping import PuntoControl
+        
         if not self.validate_inputs():
             return
             
+        # Si un scraping con los mismos parámetros quedó a medias, ofrecer reanudarlo
+        punto_control = PuntoControl.buscar(
+            self.get_output_folder(), self.tema_var.get(), self.idioma_var.get(), self.anio_var.get())
+        if punto_control and not messagebox.askyesno(
+            "Reanudar scraping",
+            f"Hay un scraping interrumpido de este tema con {punto_control.total} tweets "
+            f"guardados en {punto_control.archivo.name}.\n\n"
+            "¿Desea reanudarlo? (No = empezar uno nuevo)"
+        ):
+            punto_control = None
+            
         self.status_var.set("Preparando scraping...")
         self.progress["value"] = 0
+        self.canal.publicar(mensaje="Preparando scraping...", porcentaje=0)
+        self.canal.vigilar(self.root, self.aplicar_progreso)
         
-        # Ejecutar en un hilo separado para no bloquear la interfaz
-        threading.Thread(
-            target=self.run_async_scraping,
-            daemon=True
-        ).start()
+        # Ejecutar en el bucle asyncio de fondo para no bloquear la interfaz
+        self.futuro = asyncio.run_coroutine_threadsafe(self.scrape_and_save_tweets(punto_control), self.loop)
+        self.futuro.add_done_callback(self.scraping_terminado)
     
-    def run_async_scraping(self):
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        
+    def al_cerrar(self, evento):
+        # <Destroy> llega también por cada widget hijo. Cancelar la tarea hace
+        # que el scraping guarde lo descargado en su .parts (para reanudarlo) y
+        # cierre el índice; el bucle compartido sigue en marcha mientras tanto.
+        if evento.widget is self.root and self.futuro is not None:
+            self.futuro.cancel()
+    
+    def aplicar_progreso(self, estado):
+        self.progress["value"] = estado["porcentaje"]
+        self.status_var.set(estado["mensaje"])
+    
+    def get_output_folder(self):
+        db_folder = Path("DB")
+        subcarpeta = self.subcarpeta_var.get()
+        return db_folder / subcarpeta if subcarpeta else db_folder
+    
+    def scraping_terminado(self, futuro):
+        if futuro.cancelled():
+            # La tarea guarda lo descargado en su .parts y su punto de control al cancelarse
+            self.canal.publicar(porcentaje=0, mensaje="Scraping cancelado por el usuario; lo descargado "
+                                                      "se reanuda al iniciar el mismo scraping")
+            self.canal.detener()
+            return
         try:
-            loop.run_until_complete(self.scrape_and_save_tweets())
+            futuro.result()
         except Exception as e:
-            self.root.after(0, lambda: messagebox.showerror("Error", f"Error durante el scraping: {str(e)}"))
+            mensaje = f"Error durante el scraping: {str(e)}"
+            self.root.after(0, lambda: messagebox.showerror("Error", mensaje))
         finally:
-            loop.close()
+            self.canal.detener()
     
-    async def scrape_and_save_tweets(self):
+    async def scrape_and_save_tweets(self, punto_control=None):
+        import pandas as pd
+        from Almacenamiento import siguiente_archivo_db, listar_archivos_db, EscritorPorLotes, IndiceIds
+        from BaseDatosSQLite import EscritorSQLite, ARCHIVO_SQLITE
+        from MotorScraping import (cargar_config, PlanificadorCuotas, buscar_por_ventanas,
+                                   ventanas_de_fechas, PuntoControl)
+        
         # Actualizar estado
-        self.root.after(0, lambda: self.status_var.set("Iniciando scraping..."))
-        
-        # Configurar API
-        api = API()
-        
-        # Configurar cuenta (esto debería moverse a configuración)
-        await api.pool.add_account(
-            username="TestT27133",
-            password="AUDI_VID3",
-            email="testeoprofundo@gmail.com",
-            email_password="TestTe00",
-            user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-        )
+        self.canal.publicar(mensaje="Iniciando scraping...")
+        
+        # Configuración y sesión de twscrape (se crea en el primer scraping del proceso)
+        config = cargar_config()
+        sesion = sesion_twitter(config)
         
         # Obtener parámetros de la interfaz
         tema = self.tema_var.get()
         año = self.anio_var.get()
         idioma = self.idioma_var.get()
         limite = self.limite_var.get()
-        subcarpeta = self.subcarpeta_var.get()
         
         # Configurar rutas
-        db_folder = Path("DB")
-        db_folder.mkdir(exist_ok=True)
-        
-        if subcarpeta:
-            subcarpeta_path = db_folder / subcarpeta
-            subcarpeta_path.mkdir(exist_ok=True)
-        else:
-            subcarpeta_path = db_folder
+        subcarpeta_path = self.get_output_folder()
+        subcarpeta_path.mkdir(parents=True, exist_ok=True)
         
-        # Construir query
-        query = f"{tema} lang:{idioma} since:{año}-01-01 until:{int(año)+1}-01-01"
-        self.root.after(0, lambda: self.status_var.set(f"Buscando: {query}"))
+        # La búsqueda del año se reparte en ventanas de fechas concurrentes;
+        # al reanudar se mantiene el reparto con el que empezó el scraping
+        tamaño_ventana = punto_control.parametros["ventana"] if punto_control else config["ventana"]
+        ventanas = punto_control.pendientes() if punto_control else ventanas_de_fechas(año, tamaño_ventana)
+        self.canal.publicar(
+            mensaje=f"Buscando: {tema} lang:{idioma} en {len(ventanas)} ventanas "
+                    f"({len(config['cuentas'])} cuentas)")
         
         try:
-            await api.pool.login_all()
+            activas = await sesion.preparar()
+            if not activas:
+                raise RuntimeError(f"Ninguna cuenta pudo iniciar sesión (ver {config['archivo_cuentas']})")
             
-            # Preparar nombre de archivo
-            next_num = len(list(subcarpeta_path.glob("DB_*.xlsx"))) + 1
-            filename = subcarpeta_path / f"DB_{next_num}_{tema[:20]}_{año}.xlsx"
+            # Preparar nombre de archivo: al reanudar se sigue escribiendo en el mismo.
+            # Con la base SQLite el nombre solo identifica el scraping para reanudarlo.
+            if punto_control:
+                filename = punto_control.archivo
+            else:
+                if config["almacenamiento"] == "sqlite":
+                    filename = subcarpeta_path / f"DB_sqlite_{tema[:20]}_{año}.sqlite"
+                else:
+                    filename = siguiente_archivo_db(subcarpeta_path, tema, año)
+                punto_control = PuntoControl.crear(filename, tema, idioma, año, tamaño_ventana)
             
-            # Scrapear tweets
-            tweets = []
-            async for tweet in api.search(query, limit=limite):
-                tweets.append({
-                    "ID": tweet.id,
-                    "Fecha": tweet.date.strftime("%Y-%m-%d %H:%M:%S"),
-                    "Usuario": tweet.user.username,
-                    "Texto": tweet.rawContent.replace("\n", " "),
-                    "Likes": tweet.likeCount,
-                    "Retweets": tweet.retweetCount,
-                    "Respuestas": tweet.replyCount,
-                    "Idioma": idioma,
-                    "Tema": tema,
-                    "Año": año
-                })
-                
-                # Actualizar progreso
-                progress = (len(tweets) / limite) * 100
-                def update_progress():
-                    self.progress["value"] = progress
-                self.root.after(0, update_progress)
-                self.root.after(0, lambda: self.status_var.set(f"Obtenidos {len(tweets)} de {limite} tweets..."))
+            # Scrapear tweets: se escriben a disco por lotes mientras llegan y
+            # el punto de control se actualiza con cada lote guardado. Los tweets
+            # que ya están guardados en el tema (índice de IDs o base) se saltan.
+            if filename.suffix == ".sqlite":
+                indice = None
+                escritor = EscritorSQLite(ARCHIVO_SQLITE, subcarpeta_path.name,
+                                          al_guardar=punto_control.registrar_filas,
+                                          total=punto_control.total)
+                conocidos = escritor
+            else:
+                # El índice debe reflejar la carpeta: los IDs de archivos borrados vuelven a
+                # descargarse. Se hace con su propia conexión, que el hilo cierra aunque
+                # se cancele el scraping mientras tanto.
+                def sincronizar_indice():
+                    indice = IndiceIds(subcarpeta_path)
+                    try:
+                        indice.sincronizar(listar_archivos_db(subcarpeta_path))
+                    finally:
+                        indice.cerrar()
+                self.canal.publicar(mensaje="Actualizando el índice de tweets ya descargados...")
+                await asyncio.to_thread(sincronizar_indice)
                 
-                if len(tweets) >= limite:
-                    break
+                indice = IndiceIds(subcarpeta_path)
+                def al_guardar(filas):
+                    punto_control.registrar_filas(filas)
+                    indice.registrar(filename, [fila["ID"] for fila in filas])
+                escritor = EscritorPorLotes(filename, al_guardar=al_guardar)
+                conocidos = indice
+            vistos = escritor.ids_guardados()
+            vista_previa = []
+            
+            # Las búsquedas solo arrancan con cuentas con cuota; las esperas por
+            # límite de la API se muestran en la barra de estado
+            def al_esperar(segundos):
+                reanuda = datetime.now() + timedelta(seconds=segundos)
+                minutos, seg = divmod(int(segundos), 60)
+                self.canal.publicar(mensaje=f"⏳ Límite de la API en todas las cuentas: se reanuda en "
+                                            f"~{minutos}m {seg:02d}s ({reanuda:%H:%M:%S}). "
+                                            f"Obtenidos {escritor.total} de {limite} tweets")
+            planificador = PlanificadorCuotas(sesion.api.pool, config["peticiones_por_cuenta"],
+                                              config["minutos_limite"], al_esperar=al_esperar)
             
-            if tweets:
-                df = pd.DataFrame(tweets)
-                df.to_excel(filename, index=False)
+            def al_recibir(fila):
+                if len(vista_previa) < 3:
+                    vista_previa.append(fila)
                 
-                self.root.after(0, lambda: self.status_var.set(
-                    f"✅ {len(tweets)} tweets guardados en:\n{filename}"))
-                def set_progress_to_100():
-                    self.progress["value"] = 100
-                self.root.after(0, set_progress_to_100)
+                # Actualizar progreso (la interfaz solo muestra el último)
+                total = escritor.total
+                self.canal.publicar(porcentaje=total / limite * 100,
+                                    mensaje=f"Obtenidos {total} de {limite} tweets "
+                                            f"({planificador.tweets_por_minuto:.0f} tweets/min)...")
+            
+            completado = False
+            try:
+                await buscar_por_ventanas(
+                    sesion.api, tema, idioma, año, limite, escritor,
+                    al_recibir=al_recibir,
+                    tamaño_ventana=tamaño_ventana,
+                    concurrencia=config["concurrencia"],
+                    punto_control=punto_control,
+                    vistos=vistos,
+                    conocidos=conocidos,
+                    planificador=planificador
+                )
+                completado = True
+            finally:
+                # Si el scraping falla, lo descargado queda en DB_n_....parts
+                # junto al punto de control para reanudarlo; si no, se consolida
+                guardado = escritor.cerrar(consolidar=completado)
+                if indice is not None:
+                    indice.cerrar()
+                if completado:
+                    punto_control.eliminar()
+            
+            total = escritor.total
+            if guardado:
+                self.canal.publicar(mensaje=f"✅ {total} tweets guardados en:\n{guardado}",
+                                    porcentaje=100)
                 
-                # Mostrar vista previa
-                preview = df.head(3)[['Fecha', 'Usuario', 'Texto']].to_string(index=False)
+                # Mostrar vista previa (al reanudar, de lo descargado en esta ejecución)
+                if vista_previa:
+                    preview = pd.DataFrame(vista_previa)[['Fecha', 'Usuario', 'Texto']].to_string(index=False)
+                else:
+                    preview = "(sin tweets nuevos)"
                 self.root.after(0, lambda: messagebox.showinfo(
                     "Scraping completado", 
-                    f"Se guardaron {len(tweets)} tweets.\n\nVista previa:\n\n{preview}"))
+                    f"Se guardaron {total} tweets.\n\nVista previa:\n\n{preview}"))
                 
                 # Cerrar la ventana después de 5 segundos
                 self.root.after(5000, self.root.destroy)
             else:
-                self.root.after(0, lambda: self.status_var.set("⚠️ No se encontraron tweets con esos parámetros"))
+                self.canal.publicar(mensaje="⚠️ No se encontraron tweets con esos parámetros")
                 self.root.after(0, lambda: messagebox.showwarning(
                     "Sin resultados", 
                     "No se encontraron tweets con los parámetros especificados"))
         
         except Exception as e:
+            mensaje = str(e)
+            if punto_control and punto_control.ruta.exists():
+                mensaje += "\n\nLo descargado se conservó; vuelva a iniciar el scraping para reanudarlo."
             self.root.after(0, lambda: messagebox.showerror(
                 "Error", 
-                f"Error durante el scraping: {str(e)}"))
-            self.root.after(0, lambda: self.status_var.set(f"❌ Error: {str(e)}"))
+                f"Error durante el scraping: {mensaje}"))
+            self.canal.publicar(mensaje=f"❌ Error: {mensaje}")
     
     def cancel_scraping(self):
         if messagebox.askyesno(
@@ -463,8 +624,10 @@ class TwitterScraperApp:
             icon="question",
             default="no"
         ):
-            self.status_var.set("Scraping cancelado por el usuario")
-            self.progress["value"] = 0
+            # Como al cerrar la ventana: scraping_terminado informa de la cancelación
+            if self.futuro is not None and self.futuro.cancel():
+                return
+            self.status_var.set("No hay ningún scraping en curso")
 
 if __name__ == "__main__":
     root = tk.Tk()
@@ -0,0 +1,165 @@
+import argparse
+import os
+import sys
+import threading
+from pathlib import Path
+
+# Recursos de NLTK (léxico de VADER, tokenizador, stopwords) sin depender de
+# la red: cada recurso se busca primero en las rutas de datos de NLTK
+# (NLTK_DATA, ~/nltk_data...) y en la carpeta nltk_data/ del proyecto, y
+# solo se descarga si falta. En servidores sin conexión se copia nltk_data/
+# ya poblada (python RecursosNLTK.py --destino nltk_data en una máquina con
+# red) y se define NLTK_SIN_RED=1 para no intentar nunca una descarga.
+CARPETA_PROYECTO = Path(__file__).resolve().parent / "nltk_data"
+VARIABLE_SIN_RED = "NLTK_SIN_RED"
+
+# Recurso -> alternativas (paquete de nltk.download, ruta para nltk.data.find),
+# en orden de preferencia. Las versiones recientes de NLTK tokenizan con
+# punkt_tab y ya no leen punkt; solo las anteriores usan punkt (ver _alternativas).
+RECURSOS = {
+    'vader_lexicon': [('vader_lexicon', 'sentiment/vader_lexicon.zip')],
+    'tokenizador': [('punkt_tab', 'tokenizers/punkt_tab/spanish/'),
+                    ('punkt', 'tokenizers/punkt/spanish.pickle')],
+    'stopwords': [('stopwords', 'corpora/stopwords')],
+}
+
+RECURSOS_ANALISIS = ['vader_lexicon']
+RECURSOS_PREDICCIONES = ['vader_lexicon', 'tokenizador', 'stopwords']
+
+_disponibles = set()  # Recursos ya comprobados en este proceso
+_lock = threading.Lock()
+
+
+class RecursosNoDisponibles(Exception):
+    """Faltan recursos de NLTK y no se pudieron descargar"""
+
+
+def sin_red():
+    return os.environ.get(VARIABLE_SIN_RED, "").strip().lower() in ("1", "si", "sí", "true")
+
+
+def _registrar_carpeta_proyecto():
+    import nltk
+    carpeta = str(CARPETA_PROYECTO)
+    if CARPETA_PROYECTO.is_dir() and carpeta not in nltk.data.path:
+        nltk.data.path.insert(0, carpeta)
+
+
+def _alternativas(recurso):
+    # Con PunktTokenizer (NLTK 3.8.2+) word_tokenize solo carga punkt_tab: un
+    # punkt antiguo no basta y hay que descargar punkt_tab
+    alternativas = RECURSOS[recurso]
+    if recurso == 'tokenizador':
+        import nltk.tokenize
+        paquete = 'punkt_tab' if hasattr(nltk.tokenize, 'PunktTokenizer') else 'punkt'
+        alternativas = [a for a in alternativas if a[0] == paquete]
+    return alternativas
+
+
+def _encontrar(recurso):
+    import nltk
+    for _, ruta in _alternativas(recurso):
+        try:
+            nltk.data.find(ruta)
+            return True
+        except LookupError:
+            continue
+    return False
+
+
+def _descargar(recurso, destino=None):
+    import nltk
+    for paquete, ruta in _alternativas(recurso):
+        if nltk.download(paquete, download_dir=destino, quiet=True, raise_on_error=False):
+            try:
+                nltk.data.find(ruta, paths=[destino] if destino else None)
+                return True
+            except LookupError:
+                continue
+    return False
+
+
+def faltantes(recursos):
+    """Recursos que no están en ninguna ruta local de NLTK"""
+    _registrar_carpeta_proyecto()
+    return [r for r in recursos if r not in _disponibles and not _encontrar(r)]
+
+
+def asegurar(recursos, descargar=None):
+    """Deja disponibles `recursos`, descargando solo los que falten
+
+    Sin conexión (descargar=False o NLTK_SIN_RED=1) nunca se toca la red y
+    si falta algo se lanza RecursosNoDisponibles.
+    """
+    descargar = not sin_red() if descargar is None else descargar
+    with _lock:
+        pendientes = faltantes(recursos)
+        no_obtenidos = [r for r in pendientes if not (descargar and _descargar(r))]
+        _disponibles.update(r for r in recursos if r not in no_obtenidos)
+    if no_obtenidos:
+        motivo = "sin conexión permitida" if not descargar else "la descarga falló"
+        raise RecursosNoDisponibles(
+            f"Faltan recursos de NLTK ({', '.join(no_obtenidos)}; {motivo}). "
+            f"Cópielos en {CARPETA_PROYECTO} o en NLTK_DATA, o ejecute "
+            f"'python RecursosNLTK.py' en una máquina con conexión.")
+
+
+class EstadoRecursos:
+    """Preparación en segundo plano de los recursos de una herramienta
+
+    iniciar() lanza asegurar() en un hilo; `listo` se activa cuando termina
+    (bien o mal) y `error` guarda el motivo si faltan recursos. Todo lo que
+    puntúe textos debe comprobar listo/error antes de usar NLTK.
+    """
+
+    def __init__(self, recursos):
+        self.recursos = recursos
+        self.listo = threading.Event()
+        self.error = None
+
+    def iniciar(self, al_terminar=None):
+        def preparar():
+            try:
+                asegurar(self.recursos)
+            except Exception as e:
+                self.error = e
+            finally:
+                self.listo.set()
+            if al_terminar:
+                al_terminar(self.error)
+
+        threading.Thread(target=preparar, daemon=True).start()
+
+    @property
+    def disponibles(self):
+        return self.listo.is_set() and self.error is None
+
+    def esperar(self, timeout=None):
+        """Espera a que termine la preparación; lanza el error si faltan recursos"""
+        self.listo.wait(timeout)
+        if self.error is not None:
+            raise self.error
+        return self.listo.is_set()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Comprueba o descarga los recursos de NLTK del proyecto")
+    parser.add_argument("--destino", default=str(CARPETA_PROYECTO),
+                        help="Carpeta donde descargar (por defecto nltk_data/ del proyecto, para copiarla "
+                             "a servidores sin conexión)")
+    parser.add_argument("--comprobar", action="store_true", help="Solo indicar qué recursos faltan, sin descargar")
+    args = parser.parse_args()
+
+    if args.comprobar:
+        pendientes = faltantes(list(RECURSOS))
+        for recurso in RECURSOS:
+            print(f"{'❌' if recurso in pendientes else '✅'} {recurso}")
+        sys.exit(1 if pendientes else 0)
+
+    Path(args.destino).mkdir(parents=True, exist_ok=True)
+    errores = 0
+    for recurso in RECURSOS:
+        correcto = _descargar(recurso, args.destino)
+        errores += not correcto
+        print(f"{'✅' if correcto else '❌'} {recurso}")
+    sys.exit(1 if errores else 0)